@@ -1,21 +1,21 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, FundiProfile, ClientProfile
+from .models import User, FundiProfile, ClientProfile, Skill
 
 class UserAdmin(BaseUserAdmin):
     list_display = (
         'phone_number',
         'name',
         'role',
-        'is_on_trial',
-        'is_subscribed',
+        'is_visible',
+        'visible_until',
         'is_active',
         'is_staff',
     )
-    list_filter = ('role', 'is_active')
+    list_filter = ('role', 'is_visible', 'is_active')
     search_fields = ('phone_number', 'name', 'id_number')
     ordering = ('-date_joined',)
-    readonly_fields = ('last_login', 'date_joined', 'is_on_trial', 'is_subscribed')
+    readonly_fields = ('last_login', 'date_joined', 'is_visible', 'visible_until')
 
     fieldsets = (
         (None, {'fields': ('phone_number', 'password')}),
@@ -25,6 +25,8 @@ class UserAdmin(BaseUserAdmin):
                 'trial_started',
                 'trial_ends',
                 'subscription_end',
+                'visible_until',
+                'is_visible',
             )
         }),
         ('Permissions', {
@@ -50,4 +52,5 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(User, UserAdmin)
 admin.site.register(FundiProfile)
 admin.site.register(ClientProfile)
+admin.site.register(Skill)
 
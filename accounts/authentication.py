@@ -0,0 +1,143 @@
+"""
+Token authentication with cached token -> user resolution.
+
+DRF's TokenAuthentication joins authtoken_token to accounts_user on every
+authenticated request. CachedTokenAuthentication remembers the user's row for
+TOKEN_AUTH_CACHE['TTL'] seconds, either in a per-process LRU or, with
+'SHARED': True, in Django's default cache so all workers see evictions.
+
+Entries are evicted when a save changes a field that decides access
+(User.AUTH_FIELDS: password reset, deactivation, role, trial and
+subscription changes), when the user is deleted and when the token is
+deleted; see the receivers in accounts.models. A process-local cache can only evict in the
+process that made the write, so other workers rely on the short TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import User
+
+DEFAULTS = {
+    'SHARED': False,
+    'TTL': 60,
+    'MAX_ENTRIES': 10000,
+}
+
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class LocalTokenCache:
+    """Thread-safe LRU of token key -> (expiry, value) for this process."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, max_entries):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedTokenCache:
+    """The same interface on top of Django's default cache."""
+    prefix = 'auth-token:'
+
+    def get(self, key):
+        return cache.get(self.prefix + key)
+
+    def set(self, key, value, ttl, max_entries):
+        cache.set(self.prefix + key, value, timeout=ttl)
+
+    def delete(self, key):
+        cache.delete(self.prefix + key)
+
+    def clear(self):
+        # Shared entries expire on their own; there is no prefix delete.
+        pass
+
+
+local_cache = LocalTokenCache()
+shared_cache = SharedTokenCache()
+stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_stats_lock = threading.Lock()
+
+
+def count(name):
+    # Requests run on several threads per worker (gthread).
+    with _stats_lock:
+        stats[name] += 1
+
+
+def get_backend():
+    return shared_cache if get_config()['SHARED'] else local_cache
+
+
+def evict_token(key):
+    count('evictions')
+    get_backend().delete(key)
+
+
+def evict_user_tokens(user_id):
+    from rest_framework.authtoken.models import Token
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        evict_token(key)
+
+
+def get_stats():
+    with _stats_lock:
+        counts = dict(stats)
+    return {**counts, 'backend': 'shared' if get_config()['SHARED'] else 'local'}
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        backend = get_backend()
+        values = backend.get(key)
+        if values is not None:
+            count('hits')
+            # A fresh instance per request, so nothing cached on it leaks between requests.
+            user = User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, values)
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            return (user, self.get_model()(key=key, user=user))
+
+        count('misses')
+        user, token = super().authenticate_credentials(key)
+        config = get_config()
+        backend.set(key, [getattr(user, field) for field in USER_FIELDS], config['TTL'], config['MAX_ENTRIES'])
+        return (user, token)
@@ -0,0 +1,103 @@
+"""
+Response cache for the public fundi directory.
+
+Entries are keyed by URL and query string under a "generation" token. Any
+FundiProfile write, user delete, or fundi save that changes a field the
+directory shows (User.DIRECTORY_FIELDS) bumps the generation (see the
+receivers in accounts.models), which orphans every cached page at once. The timeout covers
+trials and subscriptions that lapse without a write.
+
+A cold key is rebuilt by one worker only: the first caller takes a short lock
+with cache.add(); the rest serve the previous copy if there is one, or wait
+briefly for the rebuild.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+GENERATION_KEY = 'fundi-directory:generation'
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+# Stale copies outlive fresh ones so waiting workers have something to serve.
+STALE_FACTOR = 4
+
+
+def directory_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_fundi_directory():
+    cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def directory_cache_key(request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    # The host is part of the key because paginated pages embed absolute links.
+    digest = hashlib.md5(f'{request.get_host()}{request.path}?{query}'.encode()).hexdigest()
+    return f'fundi-directory:{directory_generation()}:{digest}'
+
+
+def get_or_build(key, build, timeout):
+    """
+    Return the cached value for `key`, calling build() on a miss. A build that
+    returns None is passed through and not cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    stale_key = f'{key}:stale'
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            value = build()
+            if value is not None:
+                cache.set(key, value, timeout=timeout)
+                cache.set(stale_key, value, timeout=timeout * STALE_FACTOR)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    value = cache.get(stale_key)
+    if value is not None:
+        return value
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return build()
+
+
+def cache_directory_response(view_method):
+    """Cache the data of a directory view's 200 responses (see module docs)."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        uncached = []
+
+        def build():
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                uncached.append(response)
+                return None
+            return response.data
+
+        data = get_or_build(directory_cache_key(request), build, settings.FUNDI_DIRECTORY_CACHE_TIMEOUT)
+        if data is None:
+            return uncached[0]
+        return Response(data)
+
+    return wrapper
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import FundiProfile
+from accounts.skills import backfill_skill_tags
+
+
+class Command(BaseCommand):
+    help = "Tokenize FundiProfile.skills into normalized Skill tags for every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        profiles = links = 0
+
+        batch = []
+        queryset = FundiProfile.objects.only('id', 'skills').order_by('id')
+        for profile in queryset.iterator(chunk_size=batch_size):
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                links += self.flush(batch)
+                profiles += len(batch)
+                batch = []
+        if batch:
+            links += self.flush(batch)
+            profiles += len(batch)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Tagged {profiles} profiles with {links} skill links in {elapsed:.1f}s"
+        ))
+
+    def flush(self, batch):
+        with transaction.atomic():
+            return backfill_skill_tags(batch)
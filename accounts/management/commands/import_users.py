@@ -0,0 +1,190 @@
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.cache import invalidate_fundi_directory
+from accounts.models import TRIAL_DAYS, ClientProfile, FundiProfile, User
+from accounts.skills import backfill_skill_tags
+
+ROLES = {choice for choice, _ in User.ROLE_CHOICES}
+MAX_LENGTHS = {
+    name: User._meta.get_field(name).max_length
+    for name in ('phone_number', 'name', 'id_number')
+}
+MAX_REPORTED_ERRORS = 50
+
+
+def read_rows(path, fmt):
+    """Yield (line number, dict) from a CSV or NDJSON file without loading it whole."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+
+
+def clean_row(row):
+    """Return (cleaned row, None) or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "not a JSON object"
+    row = {key: str(value).strip() for key, value in row.items() if key and value is not None}
+    for field in ('phone_number', 'name', 'role'):
+        if not row.get(field):
+            return None, f"{field} is required"
+    if row['role'] not in ROLES:
+        return None, f"unknown role {row['role']!r}"
+    for field, max_length in MAX_LENGTHS.items():
+        if len(row.get(field, '')) > max_length:
+            return None, f"{field} is longer than {max_length} characters"
+    return row, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load fundis/clients from a CSV or NDJSON file. Columns: phone_number, name, "
+        "role, and optionally id_number, password, skills, location, rate_note, role_note."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Processes used to hash passwords; 0 hashes inline.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        fmt = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'ndjson')
+
+        self.dry_run = options['dry_run']
+        self.imported = self.skipped = 0
+        self.seen_phones = set()
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        pool = ProcessPoolExecutor(options['workers']) if options['workers'] > 0 else None
+        try:
+            rows = read_rows(path, fmt)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(batch, pool)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{self.imported} imported, {self.skipped} skipped "
+                    f"({self.imported / elapsed:.0f} rows/s)"
+                )
+        finally:
+            if pool:
+                pool.shutdown()
+
+        if self.imported and not self.dry_run:
+            invalidate_fundi_directory()
+
+        elapsed = time.monotonic() - started
+        verb = "Validated" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.imported} users, skipped {self.skipped}, in {elapsed:.1f}s "
+            f"({self.imported / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+    def skip(self, line, message):
+        self.skipped += 1
+        if self.skipped <= MAX_REPORTED_ERRORS:
+            self.stderr.write(f"line {line}: {message}")
+
+    def import_batch(self, batch, pool):
+        valid = []
+        for line, row in batch:
+            row, error = clean_row(row)
+            if error:
+                self.skip(line, error)
+            elif row['phone_number'] in self.seen_phones:
+                self.skip(line, f"duplicate phone_number {row['phone_number']}")
+            else:
+                self.seen_phones.add(row['phone_number'])
+                valid.append((line, row))
+
+        existing = set(User.objects.filter(
+            phone_number__in=[row['phone_number'] for _, row in valid]
+        ).values_list('phone_number', flat=True))
+        rows = []
+        for line, row in valid:
+            if row['phone_number'] in existing:
+                self.skip(line, f"phone_number {row['phone_number']} already registered")
+            else:
+                rows.append(row)
+
+        if self.dry_run:
+            self.imported += len(rows)
+            return
+        if not rows:
+            return
+
+        # Hashing dominates the import (PBKDF2 is deliberately slow), so only
+        # real passwords go to the pool; the rest get an unusable password.
+        hashes = [make_password(None) for _ in rows]
+        to_hash = [(index, row['password']) for index, row in enumerate(rows) if row.get('password')]
+        passwords = [password for _, password in to_hash]
+        hashed = pool.map(make_password, passwords, chunksize=16) if pool else map(make_password, passwords)
+        for (index, _), password in zip(to_hash, hashed):
+            hashes[index] = password
+
+        trial_ends = self.now + timedelta(days=TRIAL_DAYS)
+        users = []
+        for row, password in zip(rows, hashes):
+            is_fundi = row['role'] == 'fundi'
+            users.append(User(
+                phone_number=row['phone_number'],
+                name=row['name'],
+                id_number=row.get('id_number', ''),
+                role=row['role'],
+                password=password,
+                trial_started=self.now if is_fundi else None,
+                trial_ends=trial_ends if is_fundi else None,
+                is_visible=is_fundi,
+            ))
+
+        with transaction.atomic():
+            # bulk_create skips post_save, so profiles are built here instead of
+            # by create_user_profile.
+            User.objects.bulk_create(users)
+            fundis, clients = [], []
+            for user, row in zip(users, rows):
+                if user.role == 'fundi':
+                    profile = FundiProfile(
+                        user=user,
+                        skills=row.get('skills', ''),
+                        location=row.get('location', ''),
+                        rate_note=row.get('rate_note', ''),
+                    )
+                    profile.update_geo()
+                    fundis.append(profile)
+                elif user.role == 'client':
+                    clients.append(ClientProfile(user=user, role_note=row.get('role_note', '')))
+            FundiProfile.objects.bulk_create(fundis)
+            ClientProfile.objects.bulk_create(clients)
+            backfill_skill_tags([profile for profile in fundis if profile.skills])
+
+        self.imported += len(users)
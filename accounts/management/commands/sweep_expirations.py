@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.cache import invalidate_fundi_directory
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Hide fundis whose trial and subscription have both lapsed. Run it from cron every few minutes."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        # One UPDATE over the partial visible_until index; nothing is loaded into Python.
+        hidden = User.objects.hide_lapsed()
+        if hidden:
+            invalidate_fundi_directory()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Hid {hidden} lapsed accounts in {elapsed:.2f}s"))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm is a contrib extension; skip the typo-tolerant indexes on
+    # servers that do not ship it and let the search fall back to full text.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS fundi_skills_trgm_idx "
+            "ON accounts_fundiprofile USING gin (skills gin_trgm_ops)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS fundi_location_trgm_idx "
+            "ON accounts_fundiprofile USING gin (location gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS fundi_skills_trgm_idx")
+        cursor.execute("DROP INDEX IF EXISTS fundi_location_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_user_role_trial_ends_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fundiprofile",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "skills", config="english", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "location", config="english", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("english"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fundiprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="fundi_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
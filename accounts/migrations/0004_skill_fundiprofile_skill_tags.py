@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_fundiprofile_search_vector_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Skill",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="fundiprofile",
+            name="skill_tags",
+            field=models.ManyToManyField(
+                blank=True, related_name="fundis", to="accounts.skill"
+            ),
+        ),
+    ]
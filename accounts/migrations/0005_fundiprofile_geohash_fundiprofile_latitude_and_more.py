@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+from ajirinow.gazetteer import geocode
+from ajirinow.geo import geohash_encode
+
+
+def geocode_existing(apps, schema_editor):
+    FundiProfile = apps.get_model("accounts", "FundiProfile")
+    updated = []
+    for row in FundiProfile.objects.only("id", "location").iterator(chunk_size=1000):
+        coords = geocode(row.location)
+        if coords:
+            row.latitude, row.longitude = coords
+            row.geohash = geohash_encode(*coords)
+            updated.append(row)
+    FundiProfile.objects.bulk_update(updated, ["latitude", "longitude", "geohash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_skill_fundiprofile_skill_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fundiprofile",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=9
+            ),
+        ),
+        migrations.AddField(
+            model_name="fundiprofile",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="fundiprofile",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:56
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_visible_fundis(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    User.objects.filter(role="fundi", visible_until__gte=timezone.now()).update(
+        is_visible=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_fundiprofile_geohash_fundiprofile_latitude_and_more"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="user",
+            name="user_role_trial_ends_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="user",
+            name="user_role_sub_end_idx",
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="is_visible",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="visible_until",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.comparison.Greatest(
+                    "trial_ends", "subscription_end"
+                ),
+                output_field=models.DateTimeField(blank=True, null=True),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "is_visible"], name="user_role_visible_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_visible", True)),
+                fields=["visible_until"],
+                name="user_visible_until_idx",
+            ),
+        ),
+        migrations.RunPython(mark_visible_fundis, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_user_visibility"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FundiDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("view_count", models.PositiveIntegerField(db_default=0)),
+                ("contact_reveal_count", models.PositiveIntegerField(db_default=0)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="accounts.fundiprofile",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("profile", "day"), name="fundi_daily_stats_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,9 +1,42 @@
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import Q
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
-class UserManager(BaseUserManager):
+from ajirinow.geo import GeoLocatedModel
+
+TRIAL_DAYS = 7
+
+
+def visible_fundi_q(prefix=''):
+    """Fundis on an active trial or subscription.
+
+    The stored `is_visible` flag narrows the scan (see the partial index on
+    `visible_until`); `visible_until` is compared with now() as well, so a
+    lapsed fundi drops out before the sweep clears the flag.
+    `prefix` is the lookup path to the user, e.g. 'user__' from FundiProfile.
+    """
+    return Q(**{
+        f'{prefix}role': 'fundi',
+        f'{prefix}is_visible': True,
+        f'{prefix}visible_until__gte': timezone.now(),
+    })
+
+
+class UserQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(visible_fundi_q())
+
+    def hide_lapsed(self):
+        """Clear `is_visible` where trial and subscription have both ended, in one UPDATE."""
+        return self.filter(is_visible=True, visible_until__lt=timezone.now()).update(is_visible=False)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, phone_number, password=None, **extra_fields):
         if not phone_number:
             raise ValueError("Phone number is required")
@@ -37,15 +70,72 @@ class User(AbstractBaseUser, PermissionsMixin):
     trial_started = models.DateTimeField(null=True, blank=True)
     trial_ends = models.DateTimeField(null=True, blank=True)
     subscription_end = models.DateTimeField(null=True, blank=True)
+    visible_until = models.GeneratedField(
+        expression=Greatest('trial_ends', 'subscription_end'),
+        output_field=models.DateTimeField(null=True, blank=True),
+        db_persist=True,
+    )
+    is_visible = models.BooleanField(default=False)
+
+    # Fields that decide what a token may do; changing one evicts the user's
+    # cached token lookups (accounts.authentication).
+    AUTH_FIELDS = ('password', 'is_active', 'role', 'trial_ends', 'subscription_end')
+    # Fields the public fundi directory shows or filters on; changing one on a
+    # fundi invalidates the cached directory (accounts.cache).
+    DIRECTORY_FIELDS = ('role', 'is_visible', 'trial_ends', 'subscription_end', 'name', 'phone_number')
 
     USERNAME_FIELD = 'phone_number'
     REQUIRED_FIELDS = ['name', 'role']
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'is_visible'], name='user_role_visible_idx'),
+            models.Index(
+                fields=['visible_until'],
+                name='user_visible_until_idx',
+                condition=Q(is_visible=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.role})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred (.only()) loads leave them unknown, so the next save evicts/invalidates.
+        if set(cls.AUTH_FIELDS) <= instance.__dict__.keys():
+            instance._auth_state = instance.auth_state()
+        if set(cls.DIRECTORY_FIELDS) <= instance.__dict__.keys():
+            instance._directory_state = instance.directory_state()
+        return instance
+
+    def auth_state(self):
+        return tuple(getattr(self, name) for name in self.AUTH_FIELDS)
+
+    def directory_state(self):
+        return tuple(getattr(self, name) for name in self.DIRECTORY_FIELDS)
+
+    def save(self, *args, **kwargs):
+        # Start a new fundi's trial in the INSERT itself rather than in a second UPDATE.
+        if self._state.adding and self.role == 'fundi' and self.trial_started is None:
+            self.start_trial()
+        # Payment stores a plain date; keep it a datetime (midnight, as the
+        # database would store it) so it compares with timezone.now().
+        if isinstance(self.subscription_end, date) and not isinstance(self.subscription_end, datetime):
+            self.subscription_end = timezone.make_aware(datetime.combine(self.subscription_end, time.min))
+        self.is_visible = self.role == 'fundi' and bool(self.is_on_trial or self.is_subscribed)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'role', 'trial_ends', 'subscription_end'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        super().save(*args, **kwargs)
+
+    def start_trial(self):
+        self.trial_started = timezone.now()
+        self.trial_ends = self.trial_started + timedelta(days=TRIAL_DAYS)
+
     @property
     def is_on_trial(self):
         return self.trial_ends and timezone.now() <= self.trial_ends
@@ -54,17 +144,81 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_subscribed(self):
         return self.subscription_end and timezone.now() <= self.subscription_end
 
-class FundiProfile(models.Model):
+class Skill(models.Model):
+    """A normalized skill tag, e.g. 'plumbing' (see accounts.skills)."""
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class FundiProfileQuerySet(models.QuerySet):
+    def visible(self):
+        """Profiles that belong in the public directory."""
+        return self.filter(visible_fundi_q('user__'))
+
+    def with_skills(self, names):
+        """Profiles tagged with every one of `names` (already normalized)."""
+        queryset = self
+        for name in names:
+            queryset = queryset.filter(skill_tags__name=name)
+        return queryset
+
+
+class FundiProfile(GeoLocatedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='fundi_profile')
     skills = models.TextField()
     location = models.CharField(max_length=100)
     is_available = models.BooleanField(default=True)
     show_contact = models.BooleanField(default=True)
     rate_note = models.TextField(blank=True, help_text="e.g. Ksh 1500/day, negotiable")
+    skill_tags = models.ManyToManyField(Skill, related_name='fundis', blank=True)
+
+    # Maintained by Postgres on every insert/update, skills weighted over location.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('skills', weight='A', config='english')
+            + SearchVector('location', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = FundiProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='fundi_search_vector_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred (.only()) loads leave it unknown, so the next save re-syncs the tags.
+        if 'skills' in instance.__dict__:
+            instance._synced_skills = instance.skills
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.update_geo()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Fundi Profile: {self.user.name}"
 
+class FundiDailyStats(models.Model):
+    """Profile views and contact reveals of one fundi on one day (written by ajirinow.counters)."""
+    profile = models.ForeignKey(FundiProfile, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    view_count = models.PositiveIntegerField(db_default=0)
+    contact_reveal_count = models.PositiveIntegerField(db_default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'day'], name='fundi_daily_stats_unique'),
+        ]
+
+
 class ClientProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='client_profile')
     role_note = models.CharField(max_length=100, blank=True, help_text="e.g. Contractor, Business Owner")
@@ -72,8 +226,8 @@ class ClientProfile(models.Model):
     def __str__(self):
         return f"Client Profile: {self.user.name}"
 
-# Signal to create profile and setup trial
-from django.db.models.signals import post_save
+# Signal to create profile (the trial is set up in User.save)
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
@@ -81,9 +235,63 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         if instance.role == 'fundi':
             FundiProfile.objects.create(user=instance)
-            instance.trial_started = timezone.now()
-            instance.trial_ends = instance.trial_started + timedelta(days=7)
-            instance.save()
         elif instance.role == 'client':
             ClientProfile.objects.create(user=instance)
 
+
+@receiver(post_save, sender=FundiProfile)
+def update_skill_tags(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'skills' not in update_fields:
+        return
+    if created and not instance.skills:
+        return
+    # Saves that leave `skills` as loaded (or as last synced) keep their tags.
+    if instance.skills == getattr(instance, '_synced_skills', None):
+        return
+    from .skills import sync_skill_tags
+    sync_skill_tags(instance)
+    instance._synced_skills = instance.skills
+
+
+
+@receiver(post_delete, sender=User)
+@receiver([post_save, post_delete], sender=FundiProfile)
+def invalidate_directory_cache(sender, **kwargs):
+    from .cache import invalidate_fundi_directory
+    invalidate_fundi_directory()
+
+
+@receiver(post_save, sender=User)
+def invalidate_directory_on_fundi_change(sender, instance, update_fields=None, **kwargs):
+    # Clients, advertisers and fundi saves that leave the listed fields
+    # alone (logins, password resets) keep the cached directory.
+    if update_fields is not None and not set(User.DIRECTORY_FIELDS) & set(update_fields):
+        return
+    loaded = getattr(instance, '_directory_state', None)
+    state = instance.directory_state()
+    instance._directory_state = state
+    was_fundi = loaded is not None and loaded[User.DIRECTORY_FIELDS.index('role')] == 'fundi'
+    if state != loaded and (instance.role == 'fundi' or was_fundi):
+        from .cache import invalidate_fundi_directory
+        invalidate_fundi_directory()
+
+
+@receiver(post_save, sender=User)
+def evict_cached_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # Password resets, deactivation and subscription changes all save the
+    # user; saves that leave User.AUTH_FIELDS alone skip the Token query.
+    if update_fields is not None and not set(User.AUTH_FIELDS) & set(update_fields):
+        return
+    state = instance.auth_state()
+    changed = state != getattr(instance, '_auth_state', None)
+    instance._auth_state = state
+    if changed and not created:
+        from .authentication import evict_user_tokens
+        evict_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender='authtoken.Token')
+def evict_deleted_token(sender, instance, **kwargs):
+    # Also runs for the tokens cascaded away when a user is deleted.
+    from .authentication import evict_token
+    evict_token(instance.key)
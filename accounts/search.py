@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import FundiProfile
+
+SEARCH_CONFIG = 'english'
+
+_trigram_available = None
+
+
+def trigram_available():
+    """Whether pg_trgm is installed; checked once per process."""
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def search_fundis(query, limit=20):
+    """
+    Rank visible fundis against `query`.
+
+    Full-text matches on the indexed search_vector come first. When nothing
+    matches and pg_trgm is installed, fall back to trigram word similarity so
+    "plumbr" or "Nakru" still find something.
+    """
+    profiles = FundiProfile.objects.visible().select_related('user')
+
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    results = list(
+        profiles.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'user_id')[:limit]
+    )
+    if results or not trigram_available():
+        return results
+
+    return list(
+        profiles.filter(Q(skills__trigram_word_similar=query) | Q(location__trigram_word_similar=query))
+        .annotate(rank=Greatest(
+            TrigramWordSimilarity(query, 'skills'),
+            TrigramWordSimilarity(query, 'location'),
+        ))
+        .order_by('-rank', 'user_id')[:limit]
+    )
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from .models import User, FundiProfile, ClientProfile
+from .services import register_user
+from ajirinow.geo import GeoLocatedSerializerMixin
+from ajirinow.sparse import SparseFieldsetMixin
 
 
-class FundiProfileSerializer(serializers.ModelSerializer):
+class FundiProfileSerializer(GeoLocatedSerializerMixin, serializers.ModelSerializer):
     name = serializers.CharField(source="user.name", read_only=True)
     id_number = serializers.CharField(source="user.id_number", read_only=True)
     is_active = serializers.BooleanField(source="user.is_active", read_only=True)
@@ -21,6 +24,8 @@ class FundiProfileSerializer(serializers.ModelSerializer):
         fields = [
             'skills',
             'location',
+            'latitude',
+            'longitude',
             'is_available',
             'show_contact',
             'rate_note',
@@ -47,7 +52,7 @@ class ClientProfileSerializer(serializers.ModelSerializer):
         fields = ['role_note']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
     fundi_profile = FundiProfileSerializer(required=False)
     client_profile = ClientProfileSerializer(required=False)
@@ -71,12 +76,7 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
-        password = validated_data.pop('password', None)
-        user = User(**validated_data)
-        if password:
-            user.set_password(password)
-        user.save()
-        return user
+        return register_user(validated_data)
 
     def update(self, instance, validated_data):
         client_profile_data = validated_data.pop('client_profile', None)
@@ -99,7 +99,7 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ClientMiniSerializer(serializers.ModelSerializer):
+class ClientMiniSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['name', 'phone_number']
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from .models import User
+
+PROFILE_FIELDS = ('fundi_profile', 'client_profile')
+
+
+@transaction.atomic
+def register_user(validated_data):
+    """
+    Create a user and their role profile in one transaction.
+
+    The trial dates go into the user INSERT (User.save) and create_user_profile
+    adds the profile, so a plain signup is exactly two INSERTs. The returned
+    user has its profile relations cached, so serializing it needs no refetch.
+    """
+    profile_data = {field: validated_data.pop(field, None) for field in PROFILE_FIELDS}
+    password = validated_data.pop('password', None)
+
+    user = User(**validated_data)
+    if password:
+        user.set_password(password)
+    user.save()
+
+    for field in PROFILE_FIELDS:
+        relation = User._meta.get_field(field)
+        if not relation.is_cached(user):
+            # No profile for this role; remember that instead of querying for it later.
+            relation.set_cached_value(user, None)
+            continue
+        data = profile_data[field]
+        if data:
+            profile = relation.get_cached_value(user)
+            for attr, value in data.items():
+                setattr(profile, attr, value)
+            profile.save()
+    return user
@@ -0,0 +1,85 @@
+import re
+
+from .models import FundiProfile, Skill
+
+# Free-text skills are split on commas, slashes, semicolons, "&", "and" and newlines.
+SPLIT_RE = re.compile(r'\s*(?:[,;/&\n]|\band\b)\s*', re.IGNORECASE)
+
+# Trade names and common variants, mapped to the tag we store.
+ALIASES = {
+    'plumber': 'plumbing',
+    'plumbers': 'plumbing',
+    'fundi wa mabomba': 'plumbing',
+    'electrician': 'electrical',
+    'electricians': 'electrical',
+    'electrical wiring': 'electrical',
+    'wiring': 'electrical',
+    'mason': 'masonry',
+    'masons': 'masonry',
+    'mjengo': 'masonry',
+    'painter': 'painting',
+    'painters': 'painting',
+    'carpenter': 'carpentry',
+    'carpenters': 'carpentry',
+    'welder': 'welding',
+    'welders': 'welding',
+    'tiler': 'tiling',
+    'tilers': 'tiling',
+    'roofer': 'roofing',
+    'roofers': 'roofing',
+}
+
+MAX_TAG_LENGTH = Skill._meta.get_field('name').max_length
+
+
+def normalize_skill(value):
+    """Map one skill as typed by a user to its tag name, or '' if it is empty."""
+    name = ' '.join(value.lower().split()).strip(' .-')
+    name = ALIASES.get(name, name)
+    return name[:MAX_TAG_LENGTH]
+
+
+def tokenize_skills(text):
+    """Split a free-text skills field into unique tag names, in order."""
+    names = []
+    for part in SPLIT_RE.split(text or ''):
+        name = normalize_skill(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_skills(names):
+    """Return {name: Skill} for `names`, creating missing tags in one INSERT."""
+    skills = {skill.name: skill for skill in Skill.objects.filter(name__in=names)}
+    missing = [Skill(name=name) for name in names if name not in skills]
+    if missing:
+        # ignore_conflicts doesn't hand back primary keys, so read the new rows again.
+        Skill.objects.bulk_create(missing, ignore_conflicts=True)
+        new = Skill.objects.filter(name__in=[skill.name for skill in missing])
+        skills.update((skill.name, skill) for skill in new)
+    return skills
+
+
+def sync_skill_tags(profile):
+    skills = get_or_create_skills(tokenize_skills(profile.skills))
+    profile.skill_tags.set(skills.values())
+
+
+def backfill_skill_tags(profiles):
+    """
+    Re-tag a batch of profiles with set-based writes: one lookup/insert for the
+    tags, one DELETE and one INSERT for the links.
+    """
+    tokens = {profile.pk: tokenize_skills(profile.skills) for profile in profiles}
+    skills = get_or_create_skills({name for names in tokens.values() for name in names})
+
+    Through = FundiProfile.skill_tags.through
+    Through.objects.filter(fundiprofile_id__in=tokens.keys()).delete()
+    links = [
+        Through(fundiprofile_id=profile_id, skill_id=skills[name].pk)
+        for profile_id, names in tokens.items()
+        for name in names
+    ]
+    Through.objects.bulk_create(links)
+    return len(links)
@@ -1,4 +1,6 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -9,6 +11,7 @@ from django.utils import timezone
 
 class AccountsTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.fundi_data = {
             "phone_number": "0712345678",
@@ -48,7 +51,7 @@ class AccountsTestCase(TestCase):
         self.client.post("/api/accounts/register/", self.fundi_data, format="json")
         response = self.client.get("/api/accounts/fundis/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_public_fundi_list_after_payment(self):
         self.client.post("/api/accounts/register/", self.fundi_data, format="json")
@@ -66,7 +69,7 @@ class AccountsTestCase(TestCase):
         payment.save()
 
         response = self.client.get("/api/accounts/fundis/")
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_public_fundi_hidden_after_expired_subscription(self):
         self.client.post("/api/accounts/register/", self.fundi_data, format="json")
@@ -84,5 +87,394 @@ class AccountsTestCase(TestCase):
         payment.save()
 
         response = self.client.get("/api/accounts/fundis/")
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
+
+
+    def test_public_fundi_list_keyset_pagination(self):
+        for i in range(3):
+            User.objects.create_user(
+                phone_number=f"07100000{i}",
+                name=f"Fundi {i}",
+                id_number=f"1000{i}",
+                password="testpass123",
+                role="fundi"
+            )
+
+        response = self.client.get("/api/accounts/fundis/?page_size=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 0", "Fundi 1"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 2"])
+        self.assertIsNone(response.data["next"])
+
+        # Paging is mandatory: without page_size a request gets the default page size.
+        from accounts.views import FundiDirectoryPagination
+        with mock.patch.object(FundiDirectoryPagination, "page_size", 2):
+            response = self.client.get("/api/accounts/fundis/")
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 0", "Fundi 1"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_public_fundi_list_excludes_expired_trial(self):
+        user = User.objects.create_user(
+            phone_number="0710000009",
+            name="Lapsed Fundi",
+            id_number="10009",
+            password="testpass123",
+            role="fundi"
+        )
+        user.trial_ends = timezone.now() - timedelta(days=1)
+        user.save()
+
+        response = self.client.get("/api/accounts/fundis/")
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_sweep_expirations_hides_lapsed_fundis(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        for i in range(2):
+            User.objects.create_user(
+                phone_number=f"07110000{i}",
+                name=f"Fundi {i}",
+                id_number=f"1100{i}",
+                password="testpass123",
+                role="fundi"
+            )
+        lapsed = User.objects.get(phone_number="071100000")
+        self.assertTrue(lapsed.is_visible)
+        self.assertEqual(lapsed.visible_until, lapsed.trial_ends)
+        # A raw UPDATE leaves the flag alone, but reads compare visible_until
+        # with now() and drop the fundi already; the sweeper catches the flag up.
+        User.objects.filter(pk=lapsed.pk).update(trial_ends=timezone.now() - timedelta(days=1))
+        response = self.client.get("/api/accounts/fundis/")
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 1"])
+
+        out = StringIO()
+        with self.assertNumQueries(1):
+            call_command("sweep_expirations", stdout=out)
+        self.assertIn("Hid 1 lapsed accounts", out.getvalue())
+        lapsed.refresh_from_db()
+        self.assertFalse(lapsed.is_visible)
+
+    def test_subscription_payment_makes_fundi_visible(self):
+        user = User.objects.create_user(
+            phone_number="071200000",
+            name="Paying Fundi",
+            id_number="12000",
+            password="testpass123",
+            role="fundi"
+        )
+        user.trial_ends = timezone.now() - timedelta(days=1)
+        user.save()
+        self.assertFalse(user.is_visible)
+
+        Payment.objects.create(
+            user=user, phone=user.phone_number, amount=200,
+            merchant_request_id="m", checkout_request_id="c",
+            status="Completed", purpose="subscription",
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.is_visible)
+        self.assertEqual(user.visible_until, user.subscription_end)
+
+    def test_client_list_is_cursor_paginated_in_one_query(self):
+        for i in range(5):
+            User.objects.create_user(
+                phone_number=f"07130000{i}",
+                name=f"Client {i}",
+                id_number=f"1300{i}",
+                password="testpass123",
+                role="client"
+            )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/accounts/clients/?page_size=2")
+        self.assertEqual([c["name"] for c in response.data["results"]], ["Client 0", "Client 1"])
+        self.assertEqual(response.data["results"][0]["client_profile"], {"role_note": ""})
+
+        names = []
+        url = response.data["next"]
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            names += [c["name"] for c in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(names, ["Client 2", "Client 3", "Client 4"])
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/accounts/clients/?page_size=2&fields=id,name")
+        self.assertEqual(set(response.data["results"][0]), {"id", "name"})
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(response.data["next"]).data["results"]), 2)
+
+        with self.settings(CLIENT_LIST_MAX_PAGE_SIZE=3):
+            response = self.client.get("/api/accounts/clients/?page_size=50")
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_user_export_streams_without_passwords(self):
+        import json
+        staff = User.objects.create_superuser(
+            phone_number="0714000000", name="Ops", id_number="14000", password="testpass123", role="client"
+        )
+        self.client.force_authenticate(user=staff)
+
+        response = self.client.get("/api/accounts/users/export/")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["phone_number"] for row in rows], ["0714000000"])
+        self.assertNotIn("password", rows[0])
+
+    def test_fundi_search_ranks_skills_and_location(self):
+        for i, (skills, location) in enumerate([
+            ("plumbing, tiling", "Nakuru"),
+            ("electrical wiring", "Nakuru"),
+            ("plumbing", "Meru"),
+        ]):
+            user = User.objects.create_user(
+                phone_number=f"07200000{i}",
+                name=f"Fundi {i}",
+                id_number=f"2000{i}",
+                password="testpass123",
+                role="fundi"
+            )
+            user.fundi_profile.skills = skills
+            user.fundi_profile.location = location
+            user.fundi_profile.save()
+
+        response = self.client.get("/api/accounts/fundis/search/", {"q": "plumbing Nakuru"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([f["name"] for f in response.data], ["Fundi 0"])
+
+        response = self.client.get("/api/accounts/fundis/search/", {"q": "plumbing"})
+        self.assertEqual({f["name"] for f in response.data}, {"Fundi 0", "Fundi 2"})
+
+    def test_fundi_search_tracks_profile_updates(self):
+        self.client.post("/api/accounts/register/", self.fundi_data, format="json")
+        user = User.objects.first()
+        self.client.force_authenticate(user=user)
+        self.client.put("/api/accounts/fundis/me/", {"skills": "masonry", "location": "Meru"}, format="json")
+
+        response = self.client.get("/api/accounts/fundis/search/", {"q": "masonry"})
+        self.assertEqual(len(response.data), 1)
+
+    def test_skill_tags_filter_and_facets(self):
+        for i, skills in enumerate(["Plumber, tiling", "plumbing", "Electrician"]):
+            user = User.objects.create_user(
+                phone_number=f"07300000{i}",
+                name=f"Fundi {i}",
+                id_number=f"3000{i}",
+                password="testpass123",
+                role="fundi"
+            )
+            user.fundi_profile.skills = skills
+            user.fundi_profile.save()
+        lapsed = User.objects.get(phone_number="073000002")
+        lapsed.trial_ends = timezone.now() - timedelta(days=1)
+        lapsed.save()
+
+        # Saving a profile without touching its skills leaves the tags alone.
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.models import FundiProfile
+        profile = FundiProfile.objects.get(user__phone_number="073000000")
+        profile.location = "Meru"
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        self.assertFalse([q for q in queries if "accounts_skill" in q["sql"] or "skill_tags" in q["sql"]])
+
+        response = self.client.get("/api/accounts/fundis/", {"skill": "plumbing"})
+        self.assertEqual({f["name"] for f in response.data["results"]}, {"Fundi 0", "Fundi 1"})
+
+        response = self.client.get("/api/accounts/fundis/?skill=Plumber&skill=tiling")
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 0"])
 
+        response = self.client.get("/api/accounts/fundis/skills/")
+        self.assertEqual(response.data, [
+            {"skill": "plumbing", "count": 2},
+            {"skill": "tiling", "count": 1},
+        ])
+
+    def test_public_fundi_list_near_sorted_by_distance(self):
+        for i, location in enumerate(["Nkubu", "Westlands, Nairobi", "Meru town"]):
+            user = User.objects.create_user(
+                phone_number=f"07400000{i}",
+                name=f"Fundi {i}",
+                id_number=f"4000{i}",
+                password="testpass123",
+                role="fundi"
+            )
+            user.fundi_profile.location = location
+            user.fundi_profile.save()
+
+        response = self.client.get("/api/accounts/fundis/", {"near": "0.0463,37.6559", "radius_km": 25})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 2", "Fundi 0"])
+        self.assertEqual(response.data["results"][0]["distance_km"], 0)
+        self.assertIsNone(response.data["next"])
+
+        # Radius results are paged too, nearest first.
+        response = self.client.get("/api/accounts/fundis/", {"near": "0.0463,37.6559", "radius_km": 200,
+                                                              "page_size": 2})
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 2", "Fundi 0"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([f["name"] for f in response.data["results"]], ["Fundi 1"])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get("/api/accounts/fundis/", {"near": "north,south"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_public_fundi_list_is_cached_until_profile_changes(self):
+        self.client.post("/api/accounts/register/", self.fundi_data, format="json")
+        self.client.get("/api/accounts/fundis/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/accounts/fundis/")
+        self.assertEqual(response.data["results"][0]["skills"], "")
+
+        profile = User.objects.first().fundi_profile
+        profile.skills = "roofing"
+        profile.save()
+
+        response = self.client.get("/api/accounts/fundis/")
+        self.assertEqual(response.data["results"][0]["skills"], "roofing")
+
+        # User writes that don't change what the directory shows keep the cache.
+        from accounts.cache import directory_generation
+        generation = directory_generation()
+        self.client.post("/api/accounts/register/", self.client_data, format="json")
+        client = User.objects.get(phone_number=self.client_data["phone_number"])
+        client.name = "Renamed Client"
+        client.save()
+        fundi = User.objects.get(phone_number=self.fundi_data["phone_number"])
+        fundi.set_password("another-pass")
+        fundi.save()
+        self.assertEqual(directory_generation(), generation)
+
+        fundi.name = "Renamed Fundi"
+        fundi.save()
+        self.assertNotEqual(directory_generation(), generation)
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_profile_views_and_contact_reveals_are_counted_in_batches(self):
+        from ajirinow.counters import flush_counters
+
+        self.client.post("/api/accounts/register/", self.fundi_data, format="json")
+        fundi = User.objects.get(phone_number=self.fundi_data["phone_number"])
+        flush_counters()
+
+        self.client.get(f"/api/accounts/fundis/{fundi.id}/")
+        with self.assertNumQueries(0):
+            # Served from the directory cache and counted without a write.
+            self.client.get(f"/api/accounts/fundis/{fundi.id}/")
+        fundi.fundi_profile.show_contact = False
+        fundi.fundi_profile.save()
+        self.client.get(f"/api/accounts/fundis/{fundi.id}/")
+        self.assertEqual(flush_counters(), 5)
+
+        self.client.force_authenticate(user=fundi)
+        self.client.get(f"/api/accounts/fundis/{fundi.id}/")  # own views don't count
+        response = self.client.get("/api/accounts/fundis/me/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["view_count"], 3)
+        self.assertEqual(response.data["contact_reveal_count"], 2)
+        self.assertEqual(
+            response.data["daily"],
+            [{"day": timezone.localdate(), "view_count": 3, "contact_reveal_count": 2}],
+        )
+
+    def test_cold_cache_key_is_rebuilt_by_lock_holder_only(self):
+        from accounts.cache import get_or_build
+
+        cache.set("page:lock", 1)
+        cache.set("page:stale", ["previous"])
+        built = []
+        self.assertEqual(get_or_build("page", lambda: built.append(1) or ["fresh"], 60), ["previous"])
+        self.assertEqual(built, [])
+
+        cache.delete("page:lock")
+        self.assertEqual(get_or_build("page", lambda: built.append(1) or ["fresh"], 60), ["fresh"])
+        self.assertEqual(built, [1])
+
+    def test_cached_token_auth_saves_a_query_and_is_evicted(self):
+        from accounts.authentication import get_stats
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.post("/api/accounts/register/", self.fundi_data, format="json")
+        token = self.client.post("/api/accounts/login/", {
+            "phone_number": self.fundi_data["phone_number"],
+            "password": self.fundi_data["password"]
+        }).data["token"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get("/api/accounts/fundis/me/")
+        hits = get_stats()["hits"]
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get("/api/accounts/fundis/me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(warm), len(cold) - 1)
+        self.assertEqual(get_stats()["hits"], hits + 1)
+
+        # Saves that don't touch access (name edits, visibility) keep the entry.
+        user = User.objects.get(phone_number=self.fundi_data["phone_number"])
+        user.name = "Renamed Fundi"
+        with CaptureQueriesContext(connection) as saved:
+            user.save()
+            user.save(update_fields=["is_visible"])
+        self.assertFalse([q for q in saved if "authtoken_token" in q["sql"]])
+        with CaptureQueriesContext(connection) as still_warm:
+            self.client.get("/api/accounts/fundis/me/")
+        self.assertEqual(len(still_warm), len(warm))
+
+        self.client.post("/api/accounts/reset-password/", {
+            "phone_number": self.fundi_data["phone_number"],
+            "id_number": self.fundi_data["id_number"],
+            "new_password": "newpass456"
+        })
+        with CaptureQueriesContext(connection) as after_reset:
+            self.client.get("/api/accounts/fundis/me/")
+        self.assertEqual(len(after_reset), len(cold))
+
+        self.client.delete("/api/accounts/fundis/me/delete/")
+        response = self.client.get("/api/accounts/fundis/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_users_command(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        User.objects.create_user(phone_number="0799999999", name="Existing", password="x", role="client")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write(
+                "phone_number,name,id_number,role,password,skills,location\n"
+                "0751000001,Imported Fundi,111,fundi,secret123,\"Plumber, tiling\",Thika\n"
+                "0751000002,Imported Client,222,client,,,\n"
+                "0751000003,No Role,333,,,,\n"
+                "0799999999,Duplicate,444,client,,,\n"
+            )
+
+        out, err = StringIO(), StringIO()
+        call_command("import_users", handle.name, "--workers", "0", stdout=out, stderr=err)
+
+        self.assertIn("Imported 2 users, skipped 2", out.getvalue())
+        self.assertIn("line 4: role is required", err.getvalue())
+        fundi = User.objects.get(phone_number="0751000001")
+        self.assertTrue(fundi.check_password("secret123"))
+        self.assertTrue(fundi.is_on_trial)
+        self.assertEqual(
+            sorted(fundi.fundi_profile.skill_tags.values_list("name", flat=True)), ["plumbing", "tiling"]
+        )
+        self.assertNotEqual(fundi.fundi_profile.geohash, "")
+        self.assertFalse(User.objects.get(phone_number="0751000002").has_usable_password())
+        self.assertTrue(User.objects.get(phone_number="0751000002").client_profile)
+
+    def test_register_fundi_query_count(self):
+        # Phone uniqueness check, then user + profile INSERTs inside one savepoint.
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/accounts/register/", self.fundi_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["fundi_profile"]["on_trial"])
+        self.assertIsNone(response.data["client_profile"])
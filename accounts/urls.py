@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView,LoginView,FundiProfileView,FundiDeleteView,FundiPublicList,FundiPublicDetail,ClientRegisterView,ClientLoginView,ClientListView,ClientMeView, FundiResetPasswordView, ClientResetPasswordView
+from .views import RegisterView,LoginView,FundiProfileView,FundiDeleteView,FundiPublicList,FundiSkillFacetView,FundiSearchView,FundiPublicDetail,ClientRegisterView,ClientLoginView,ClientListView,ClientMeView, FundiResetPasswordView, ClientResetPasswordView, AuthCacheStatsView, UserExportView, FundiStatsView
 
 
 urlpatterns = [
@@ -8,9 +8,14 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('fundis/me/', FundiProfileView.as_view()),
     path('fundis/me/delete/', FundiDeleteView.as_view()),
+    path('fundis/me/stats/', FundiStatsView.as_view(), name='fundi-stats'),
     path('fundis/', FundiPublicList.as_view()),
+    path('fundis/search/', FundiSearchView.as_view(), name='fundi-search'),
+    path('fundis/skills/', FundiSkillFacetView.as_view(), name='fundi-skills'),
     path('fundis/<int:pk>/', FundiPublicDetail.as_view()),
     path('reset-password/', FundiResetPasswordView.as_view(), name='reset-password'),
+    path('auth-cache/stats/', AuthCacheStatsView.as_view(), name='auth-cache-stats'),
+    path('users/export/', UserExportView.as_view(), name='user-export'),
 
 
     #client urls
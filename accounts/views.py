@@ -6,8 +6,19 @@ from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from rest_framework.permissions import IsAuthenticated
 from .serializers import UserSerializer, FundiProfileSerializer
-from .models import FundiProfile, User
+from .models import FundiDailyStats, FundiProfile, Skill, User, visible_fundi_q
+from .search import search_fundis
+from .cache import cache_directory_response
+from .authentication import get_stats as get_auth_cache_stats
+from .skills import normalize_skill
+from django.conf import settings
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
+from ajirinow.counters import Counter, counter_totals
+from ajirinow.exports import ExportView
+from ajirinow.pagination import KeysetPagination
+from ajirinow.sparse import SparseQuerysetMixin
+from ajirinow.geo import filter_near, parse_near
 
 
 class RegisterView(APIView):
@@ -51,6 +62,8 @@ class FundiProfileView(APIView):
             "subscription_end": user.subscription_end,
             "skills": profile.skills,
             "location": profile.location,
+            "latitude": profile.latitude,
+            "longitude": profile.longitude,
             "rate_note": profile.rate_note,
             "is_available": profile.is_available,
             "show_contact": profile.show_contact,
@@ -84,31 +97,133 @@ class FundiDeleteView(APIView):
         return Response({"message": "Account deleted"}, status=204)
 
 
+def public_fundi_data(profile):
+    return {
+        "id": profile.user.id,
+        "name": profile.user.name,
+        "skills": profile.skills,
+        "location": profile.location,
+        "rate_note": profile.rate_note,
+        "is_available": profile.is_available,
+        "phone_number": profile.user.phone_number if profile.show_contact else None,
+    }
+
+
+PUBLIC_FUNDI_COLUMNS = (
+    'user_id', 'user__name', 'skills', 'location', 'rate_note', 'is_available',
+    'show_contact', 'user__phone_number',
+)
+
+
+def public_fundi_row(row):
+    """public_fundi_data() for a `.values(*PUBLIC_FUNDI_COLUMNS)` row."""
+    return {
+        "id": row['user_id'],
+        "name": row['user__name'],
+        "skills": row['skills'],
+        "location": row['location'],
+        "rate_note": row['rate_note'],
+        "is_available": row['is_available'],
+        "phone_number": row['user__phone_number'] if row['show_contact'] else None,
+    }
+
+
+class FundiDirectoryPagination(KeysetPagination):
+    ordering = ('user_id',)
+    opt_in = False
+
+
+class FundiNearPagination(KeysetPagination):
+    """Radius results, nearest first; always paginated since a radius can cover the whole directory."""
+    ordering = ('distance_km', 'user_id')
+    opt_in = False
+
+
 class FundiPublicList(APIView):
+    """
+    GET: Fundis on an active trial or subscription.
+    Filter with one or more `skill` params (e.g. ?skill=plumbing&skill=tiling).
+    `near=lat,lon` (with optional `radius_km`, default 10) returns fundis within
+    the radius, nearest first, each with a `distance_km`.
+    Results come a page (`page_size`, default 20, max 100) at a time; follow
+    `next` for more.
+    """
+    pagination_class = FundiDirectoryPagination
+    near_pagination_class = FundiNearPagination
+
+    @cache_directory_response
     def get(self, request):
-        profiles = FundiProfile.objects.select_related('user').filter(user__role='fundi')
-        visible_fundis = [
-            profile for profile in profiles
-            if profile.user.is_on_trial or profile.user.is_subscribed
-        ]
-
-        data = []
-        for profile in visible_fundis:
-            data.append({
-                "id": profile.user.id,
-                "name": profile.user.name,
-                "skills": profile.skills,
-                "location": profile.location,
-                "rate_note": profile.rate_note,
-                "is_available": profile.is_available,
-                "phone_number": profile.user.phone_number if profile.show_contact else None,
-            })
-
-        return Response(data)
+        profiles = FundiProfile.objects.visible()
+
+        skills = [normalize_skill(skill) for skill in request.query_params.getlist('skill')]
+        if skills:
+            profiles = profiles.with_skills(skill for skill in skills if skill)
+
+        near = parse_near(request.query_params)
+        if near:
+            rows = filter_near(profiles, *near).values(*PUBLIC_FUNDI_COLUMNS, 'distance_km')
+            paginator = self.near_pagination_class()
+            page = paginator.paginate_queryset(rows, request, view=self)
+            return paginator.get_paginated_response([
+                {**public_fundi_row(row), "distance_km": round(row['distance_km'], 2)} for row in page
+            ])
+
+        rows = profiles.values(*PUBLIC_FUNDI_COLUMNS)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response([public_fundi_row(row) for row in page])
+
+
+class FundiSkillFacetView(APIView):
+    """
+    GET: Number of visible fundis per skill tag, most common first.
+    """
+    def get(self, request):
+        facets = (
+            Skill.objects.filter(visible_fundi_q('fundis__user__'))
+            .annotate(count=Count('fundis'))
+            .order_by('-count', 'name')
+            .values('name', 'count')
+        )
+        return Response([{"skill": facet["name"], "count": facet["count"]} for facet in facets])
+
+
+class FundiSearchView(APIView):
+    """
+    GET: Visible fundis ranked against `q` (skills weighted over location).
+    Optional `limit` (default 20, max 50).
+    """
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), self.max_limit))
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+
+        return Response([public_fundi_data(profile) for profile in search_fundis(query, limit)])
+
+
+# Keyed by user id, which is all a cached detail response needs.
+PROFILE_VIEWS = Counter(FundiDailyStats, 'view_count', target='profile', key='user_id')
+CONTACT_REVEALS = Counter(FundiDailyStats, 'contact_reveal_count', target='profile', key='user_id')
 
 
 class FundiPublicDetail(APIView):
     def get(self, request, pk):
+        response = self.get_fundi(request, pk)
+        if response.status_code == 200 and request.user.pk != pk:
+            PROFILE_VIEWS.increment(pk)
+            if response.data["phone_number"]:
+                CONTACT_REVEALS.increment(pk)
+        return response
+
+    @cache_directory_response
+    def get_fundi(self, request, pk):
         user = get_object_or_404(User, id=pk, role='fundi')
         profile = user.fundi_profile
         return Response({
@@ -122,6 +237,51 @@ class FundiPublicDetail(APIView):
         })
 
 
+class FundiStatsView(APIView):
+    """
+    GET (fundis): How often the fundi's public profile was viewed and their
+    number shown, in total and per day for the last `days` (default 30, max 90).
+    Counts are written in batches, so the latest few seconds may be missing.
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 90
+
+    def get(self, request):
+        if request.user.role != 'fundi':
+            return Response({"error": "Not authorized"}, status=403)
+        try:
+            days = max(1, min(int(request.query_params.get("days", 30)), self.max_days))
+        except ValueError:
+            return Response({"error": "days must be a number"}, status=400)
+
+        stats = FundiDailyStats.objects.filter(profile__user=request.user)
+        return Response(counter_totals(stats, ('view_count', 'contact_reveal_count'), days))
+
+
+class AuthCacheStatsView(APIView):
+    """
+    GET (staff): Hit/miss/eviction counters of the token cache in this worker.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_auth_cache_stats())
+
+
+class UserExportView(ExportView):
+    """
+    GET (staff): Every user, without password hashes, as NDJSON or CSV (`format`),
+    optionally bounded by `since`/`until` on date_joined and gzipped with `gzip=1`.
+    """
+    queryset = User.objects.order_by('id')
+    columns = (
+        'id', 'phone_number', 'name', 'id_number', 'role', 'is_active', 'is_staff', 'date_joined',
+        'trial_started', 'trial_ends', 'subscription_end', 'is_visible',
+    )
+    name = 'users'
+    date_field = 'date_joined'
+
+
 class FundiResetPasswordView(APIView):
     def post(self, request):
         phone = request.data.get("phone_number")
@@ -159,10 +319,27 @@ class ClientLoginView(APIView):
         return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
 
-class ClientListView(generics.ListAPIView):
-    queryset = User.objects.filter(role='client')
+class ClientListPagination(KeysetPagination):
+    ordering = ('date_joined', 'id')
+    opt_in = False
+
+    @property
+    def max_page_size(self):
+        return settings.CLIENT_LIST_MAX_PAGE_SIZE
+
+
+class ClientListView(SparseQuerysetMixin, generics.ListAPIView):
+    """
+    GET: Clients, oldest first, one page at a time (`page_size`, then the returned `cursor`).
+    `fields=a,b` / `exclude=c` return only some fields.
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ClientListPagination
+
+    def get_queryset(self):
+        clients = User.objects.filter(role='client').select_related('client_profile', 'fundi_profile')
+        return self.narrow_queryset(clients)
 
 
 class ClientMeView(generics.RetrieveUpdateDestroyAPIView):
@@ -0,0 +1,89 @@
+"""
+Ad image storage and precomputed variant URLs.
+
+Each ad keeps the URLs of a fixed set of variants in `Ad.image_variants`,
+built once when the image is stored, so list responses pick one with
+`?size=` instead of building a URL per row.
+
+The backend is AD_IMAGE_BACKEND: Cloudinary in production (variants are
+on-the-fly Cloudinary transformations), or LocalImageBackend, which keeps
+files on disk and needs no network, for development and tests.
+"""
+import os
+import uuid
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from cloudinary import CloudinaryResource, uploader
+from cloudinary.utils import generate_transformation_string
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+# Transformation options per variant (Cloudinary's names). `full` is the
+# original as uploaded.
+VARIANTS = {
+    'thumbnail': {'width': 160, 'height': 160, 'crop': 'fill', 'gravity': 'auto', 'quality': 'auto', 'format': 'jpg'},
+    'card': {'width': 640, 'height': 360, 'crop': 'fill', 'gravity': 'auto', 'quality': 'auto', 'format': 'jpg'},
+    'full': {},
+    'webp': {'width': 1600, 'crop': 'limit', 'quality': 'auto', 'format': 'webp'},
+}
+DEFAULT_VARIANT = 'full'
+
+
+class ImageBackend:
+    """Where ad images are stored. AD_IMAGE_BACKEND names a subclass."""
+
+    def upload(self, file):
+        """Store a File; returns the CloudinaryResource the Ad.image column holds."""
+        raise NotImplementedError
+
+    def variant_urls(self, resource):
+        """{variant: absolute URL} for every name in VARIANTS."""
+        raise NotImplementedError
+
+
+class CloudinaryImageBackend(ImageBackend):
+    def upload(self, file):
+        return uploader.upload_resource(file, type='upload', resource_type='image')
+
+    def variant_urls(self, resource):
+        return {name: resource.build_url(secure=True, **options) for name, options in VARIANTS.items()}
+
+
+class LocalImageBackend(ImageBackend):
+    """
+    Offline stand-in for Cloudinary: files are saved under
+    AD_IMAGE_LOCAL_ROOT and variant URLs mirror Cloudinary's layout under
+    AD_IMAGE_LOCAL_URL (no resized copies are actually generated).
+    """
+
+    @property
+    def storage(self):
+        return FileSystemStorage(location=settings.AD_IMAGE_LOCAL_ROOT, base_url=settings.AD_IMAGE_LOCAL_URL)
+
+    def upload(self, file):
+        extension = os.path.splitext(file.name)[1].lower() or '.jpg'
+        name = self.storage.save(f'ads/{uuid.uuid4().hex}{extension}', file)
+        public_id, _, image_format = name.rpartition('.')
+        return CloudinaryResource(public_id=public_id, format=image_format, type='upload', resource_type='image')
+
+    def variant_urls(self, resource):
+        urls = {}
+        for name, options in VARIANTS.items():
+            options = dict(options)
+            image_format = options.pop('format', resource.format)
+            transformation = generate_transformation_string(**options)[0]
+            path = '/'.join(filter(None, ['image/upload', transformation, resource.public_id]))
+            # Not storage.url(), which would percent-encode the commas.
+            urls[name] = urljoin(self.storage.base_url, f'{path}.{image_format}' if image_format else path)
+        return urls
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def image_backend():
+    return load_backend(settings.AD_IMAGE_BACKEND)
@@ -0,0 +1,90 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+
+from ads.preprocess import preprocess_image
+
+
+def photo(width, height, seed):
+    """Noisy gradient, compressing roughly like a phone photo."""
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), 40 + seed % 20).convert('RGB')
+    return Image.blend(image, noise, 0.35)
+
+
+def poster(width, height, seed):
+    image = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    for i in range(40):
+        x, y = (i * 97 + seed) % width, (i * 53 + seed) % height
+        draw.rectangle((x, y, x + width // 6, y + height // 12), fill=(i * 6 % 255, 80, 160, 255))
+    return image
+
+
+def encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def sample_corpus(count):
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'PhoneMaker'
+    corpus = []
+    for seed in range(count):
+        corpus.append(('12MP phone JPEG', encode(photo(4032, 3024, seed), 'JPEG', quality=92, exif=exif)))
+        corpus.append(('screenshot PNG', encode(poster(1080, 2400, seed).convert('RGB'), 'PNG')))
+        corpus.append(('transparent PNG', encode(poster(2000, 2000, seed), 'PNG')))
+        corpus.append(('small JPEG', encode(photo(800, 600, seed), 'JPEG', quality=85)))
+    return corpus
+
+
+class Command(BaseCommand):
+    help = "Measure ad image preprocessing throughput and bytes saved on a sample corpus (or --dir)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Use the images in this directory instead of generated samples.")
+        parser.add_argument('--count', type=int, default=3, help="Generated samples of each kind.")
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+
+    def handle(self, *args, **options):
+        if options['dir']:
+            corpus = []
+            for name in sorted(os.listdir(options['dir'])):
+                with open(os.path.join(options['dir'], name), 'rb') as f:
+                    corpus.append((os.path.splitext(name)[1].lower() or 'file', f.read()))
+        else:
+            corpus = sample_corpus(options['count'])
+
+        def process(data):
+            return preprocess_image(data, settings.AD_IMAGE_MAX_PIXELS, settings.AD_IMAGE_MAX_DIMENSION,
+                                    settings.AD_IMAGE_JPEG_QUALITY)[0]
+
+        by_kind = {}
+        for kind, data in corpus:
+            before, after = by_kind.get(kind, (0, 0))
+            by_kind[kind] = (before + len(data), after + len(process(data)))
+        total_in = sum(before for before, _ in by_kind.values())
+        total_out = sum(after for _, after in by_kind.values())
+        for kind, (before, after) in by_kind.items():
+            self.stdout.write(f"{kind:<18} {before / 1e6:8.2f} MB -> {after / 1e6:7.2f} MB  "
+                              f"({100 - after * 100 / before:5.1f}% saved)")
+
+        for workers in options['workers']:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                started = time.perf_counter()
+                list(pool.map(process, [data for _, data in corpus]))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(f"{workers} workers: {len(corpus) / elapsed:6.1f} images/s, "
+                              f"{total_in / 1e6 / elapsed:6.1f} MB/s in")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(corpus)} images: {total_in / 1e6:.1f} MB -> {total_out / 1e6:.1f} MB "
+            f"({100 - total_out * 100 / total_in:.1f}% saved)"
+        ))
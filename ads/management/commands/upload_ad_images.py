@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ads.uploads import process_pending
+
+
+class Command(BaseCommand):
+    help = "Push staged ad images to the image backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            count = process_pending()
+            if count or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Processed {count} uploads in {time.monotonic() - started:.2f}s"
+                ))
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0003_alter_ad_image"),
+        ("payments", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["expires_at"],
+                name="ad_active_expires_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+def precompute_variants(apps, schema_editor):
+    from ads.images import image_backend
+
+    Ad = apps.get_model("ads", "Ad")
+    backend = image_backend()
+    ads = []
+    for ad in Ad.objects.exclude(image="").only("id", "image").iterator(chunk_size=1000):
+        ad.image_variants = backend.variant_urls(ad.image)
+        ads.append(ad)
+    Ad.objects.bulk_update(ads, ["image_variants"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0004_active_expires_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(precompute_variants, migrations.RunPython.noop),
+    ]
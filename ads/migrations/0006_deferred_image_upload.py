@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:33
+
+import cloudinary.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0005_ad_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending upload"),
+                    ("ready", "Ready"),
+                    ("failed", "Upload failed"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ad",
+            name="image",
+            field=cloudinary.models.CloudinaryField(
+                max_length=255, null=True, verbose_name="image"
+            ),
+        ),
+        migrations.CreateModel(
+            name="AdImageUpload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("staged_name", models.CharField(max_length=255)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("retry_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "ad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_upload",
+                        to="ads.ad",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["retry_at"], name="ad_image_upload_retry_idx")
+                ],
+            },
+        ),
+    ]
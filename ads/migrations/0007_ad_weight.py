@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0006_deferred_image_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="weight",
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+    ]
@@ -1,19 +1,37 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User
 from payments.models import Payment
 from cloudinary.models import CloudinaryField
+from ajirinow.expiry import ExpiringQuerySet
 
 # Define the upload path for ad images
 def ad_image_upload_path(instance, filename):
     return f'ads/{instance.client.id}_{instance.client.name}/{filename}'
 
 class Ad(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PENDING, 'Pending upload'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Upload failed'),
+    ]
+    # Only updated when the image itself changes (see save()).
+    IMAGE_FIELDS = ('image', 'image_variants', 'image_status')
+
     client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ads')
     title = models.CharField(max_length=100)
     description = models.TextField()
-    image = CloudinaryField('image', blank=False, null=False)
+    # Null while a deferred upload is pending (see ads.uploads).
+    image = CloudinaryField('image', blank=False, null=True)
+    # {variant: absolute URL} for ads.images.VARIANTS, set when the image is stored.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_READY, editable=False)
 
     link = models.URLField(
         blank=True,
@@ -22,8 +40,21 @@ class Ad(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=False)  # Initially inactive
+    # Relative share of impressions in /api/ads/serve/ (0 keeps the ad out of rotation).
+    weight = models.PositiveSmallIntegerField(default=1)
     payment = models.ForeignKey(Payment, null=True, blank=True, on_delete=models.SET_NULL)
 
+    objects = ExpiringQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['expires_at'],
+                name='ad_active_expires_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
     def activate(self):
         """
         Activates the ad by setting is_active=True and setting expiry to 7 days from now.
@@ -33,12 +64,104 @@ class Ad(models.Model):
         self.expires_at = timezone.now() + timedelta(days=7)
         self.save()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred (.only()) loads leave the image unread.
+        instance._stored_image = instance.image_key() if 'image' in instance.__dict__ else None
+        return instance
+
+    def image_key(self):
+        """What the image column holds (an UploadedFile not yet stored counts as itself)."""
+        if not self.image or isinstance(self.image, UploadedFile):
+            return self.image or None
+        return self._meta.get_field('image').to_python(self.image).get_prep_value()
+
+    def store_image(self):
+        """
+        Store a new image: stage an uploaded file for the background upload
+        (or upload it now with AD_IMAGE_DEFERRED_UPLOAD off) and precompute
+        variant URLs once it is stored. Returns the staged file's name, if any.
+        """
+        from .images import image_backend
+        from .uploads import stage_image
+
+        staged = None
+        if isinstance(self.image, UploadedFile):
+            if settings.AD_IMAGE_DEFERRED_UPLOAD:
+                staged = stage_image(self.image)
+                self.image = None
+            else:
+                self.image = image_backend().upload(self.image)
+        elif self.image:
+            self.image = self._meta.get_field('image').to_python(self.image)
+
+        if self.image:
+            self.image_variants = image_backend().variant_urls(self.image)
+            self.image_status = self.IMAGE_READY
+        else:
+            self.image_variants = {}
+            self.image_status = self.IMAGE_PENDING
+        self._stored_image = self.image_key()
+        return staged
+
     def save(self, *args, **kwargs):
         # Automatically deactivate if expired
         if self.expires_at and self.expires_at < timezone.now():
             self.is_active = False
-        super().save(*args, **kwargs)
+
+        staged = None
+        update_fields = kwargs.get('update_fields')
+        if 'image' in self.__dict__ and self.image_key() != getattr(self, '_stored_image', None):
+            if update_fields is None or 'image' in update_fields:
+                staged = self.store_image()
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, *self.IMAGE_FIELDS}
+        elif update_fields is None and not self._state.adding:
+            # A background upload may have stored the image since this
+            # instance was loaded; don't write the stale values back.
+            self._keep_stored_image = True
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._keep_stored_image = False
+
+        if staged:
+            from .uploads import enqueue_upload
+            enqueue_upload(self, staged)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Only the UPDATE skips the image columns; if it matches no row the
+        # INSERT that follows still writes them.
+        if getattr(self, '_keep_stored_image', False):
+            values = [value for value in values if value[0].name not in self.IMAGE_FIELDS]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
 
     def __str__(self):
         return f"Ad: {self.title} by {self.client.name}"
 
+
+class AdImageUpload(models.Model):
+    """A staged ad image waiting to be pushed to the image backend (see ads.uploads)."""
+    ad = models.OneToOneField(Ad, on_delete=models.CASCADE, related_name='pending_upload')
+    staged_name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    retry_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['retry_at'], name='ad_image_upload_retry_idx'),
+        ]
+
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver([post_save, post_delete], sender=Ad)
+def invalidate_rotation_pool(sender, **kwargs):
+    from .rotation import invalidate_pool
+    invalidate_pool()
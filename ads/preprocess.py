@@ -0,0 +1,116 @@
+"""
+Ad image preprocessing before storage.
+
+Uploads are checked against AD_IMAGE_MAX_UPLOAD_BYTES and
+AD_IMAGE_MAX_PIXELS (from the header, before decoding), rotated upright,
+stripped of EXIF and other metadata, shrunk to fit AD_IMAGE_MAX_DIMENSION
+and recompressed: JPEG, or PNG for images with transparency (and for
+PNG/GIF uploads that come out smaller that way).
+
+The work runs in a pool of AD_IMAGE_WORKERS threads (Pillow releases the
+GIL while decoding, resizing and encoding). At most twice that many images
+are admitted at once, so a burst of uploads can't hold an unbounded number
+of decoded bitmaps in memory; uploads that can't get a slot in time are
+turned away.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework.exceptions import ValidationError
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'MPO'}
+LOSSLESS_FORMATS = {'PNG', 'GIF'}
+SLOT_TIMEOUT = 10
+RESULT_TIMEOUT = 30
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class ImageBusy(Exception):
+    pass
+
+
+def preprocess_image(data, max_pixels, max_dimension, quality):
+    """
+    Validate and re-encode image bytes. Returns (bytes, extension, content type).
+    Raises ValidationError for anything that isn't an acceptable image.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise ValidationError("Upload a valid JPEG, PNG, WebP or GIF image.")
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError("Upload a valid JPEG, PNG, WebP or GIF image.")
+    source_format = image.format
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ValidationError(f"Image is too large ({width}x{height}); the limit is {max_pixels} pixels.")
+
+    try:
+        image.load()
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Image file is corrupt or truncated.")
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    # Saving without exif/icc/info drops the metadata.
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if has_alpha:
+        return encode(image.convert('RGBA'), 'PNG', optimize=True), '.png', 'image/png'
+    jpeg = encode(image.convert('RGB'), 'JPEG', quality=quality, optimize=True, progressive=True)
+    if source_format in LOSSLESS_FORMATS:
+        # Screenshots and flat graphics are often smaller as PNG.
+        png = encode(image.convert('RGB'), 'PNG', optimize=True)
+        if len(png) < len(jpeg):
+            return png, '.png', 'image/png'
+    return jpeg, '.jpg', 'image/jpeg'
+
+
+def encode(image, image_format, **options):
+    output = io.BytesIO()
+    image.save(output, image_format, **options)
+    return output.getvalue()
+
+
+def get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.AD_IMAGE_WORKERS
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ad-image')
+            _slots = threading.BoundedSemaphore(workers * 2)
+    return _pool, _slots
+
+
+def submit(data):
+    """Run preprocess_image() in the pool; raises ImageBusy when no slot frees up in time."""
+    pool, slots = get_pool()
+    if not slots.acquire(timeout=SLOT_TIMEOUT):
+        raise ImageBusy()
+    try:
+        future = pool.submit(
+            preprocess_image, data, settings.AD_IMAGE_MAX_PIXELS,
+            settings.AD_IMAGE_MAX_DIMENSION, settings.AD_IMAGE_JPEG_QUALITY,
+        )
+        future.add_done_callback(lambda _: slots.release())
+    except BaseException:
+        slots.release()
+        raise
+    return future.result(timeout=RESULT_TIMEOUT)
+
+
+def preprocess_upload(upload):
+    """An UploadedFile holding the processed image, named after the original."""
+    if upload.size > settings.AD_IMAGE_MAX_UPLOAD_BYTES:
+        raise ValidationError(f"Image is larger than {settings.AD_IMAGE_MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+    upload.seek(0)
+    data, extension, content_type = submit(upload.read())
+    name = os.path.splitext(os.path.basename(upload.name))[0] or 'image'
+    return SimpleUploadedFile(f'{name}{extension}', data, content_type=content_type)
@@ -0,0 +1,156 @@
+"""
+In-memory ad rotation for /api/ads/serve/.
+
+Each process keeps a pool of the servable ads (live, image ready), rendered
+once into plain dicts. The pool is rebuilt with one query when it is older
+than AD_POOL_REFRESH_INTERVAL seconds, or on the next request after an Ad
+is saved or deleted in this process, so serving normally touches no
+database.
+
+Ads are drawn by weighted random sampling without replacement
+(Efraimidis-Spirakis: each ad gets the key random() ** (1 / weight) and the
+highest keys win). A response has at most one ad per advertiser, and a
+viewer (user, or client IP when anonymous) sees at most AD_FREQUENCY_CAP
+ads from one advertiser per AD_FREQUENCY_WINDOW seconds. The caps are
+tracked per process, so with several workers they are approximate.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .images import VARIANTS
+from .models import Ad
+
+# Image variant served in each slot.
+SLOTS = {
+    'banner': 'full',
+    'feed': 'card',
+    'sidebar': 'thumbnail',
+}
+DEFAULT_SLOT = 'feed'
+MAX_VIEWERS = 50000
+POOL_COLUMNS = ('id', 'client_id', 'client__name', 'title', 'description', 'link', 'weight', 'image_variants',
+                'expires_at')
+
+assert set(SLOTS.values()) <= set(VARIANTS)
+
+
+class AdPool:
+    def __init__(self):
+        self.entries = []
+        self.built_at = None
+        self.dirty = True
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        self.dirty = True
+
+    def is_stale(self):
+        return self.dirty or time.monotonic() - self.built_at > settings.AD_POOL_REFRESH_INTERVAL
+
+    def get(self):
+        """The current entries, rebuilt first if stale (by one thread; the others keep serving the old pool)."""
+        if self.is_stale() and self.lock.acquire(blocking=self.built_at is None):
+            try:
+                if self.is_stale():
+                    self.dirty = False
+                    self.entries = self.build()
+                    self.built_at = time.monotonic()
+            except Exception:
+                self.dirty = True
+                raise
+            finally:
+                self.lock.release()
+        return self.entries
+
+    def build(self):
+        rows = (
+            Ad.objects.live()
+            .filter(image_status=Ad.IMAGE_READY, weight__gt=0)
+            .order_by('id')
+            .values(*POOL_COLUMNS)
+        )
+        return list(rows)
+
+
+class FrequencyCaps:
+    """Per-viewer impression counts per advertiser in fixed windows, for the most recent MAX_VIEWERS viewers."""
+
+    def __init__(self):
+        self.viewers = OrderedDict()
+        self.lock = threading.Lock()
+
+    def counts(self, viewer):
+        window = int(time.time() // settings.AD_FREQUENCY_WINDOW)
+        with self.lock:
+            seen = self.viewers.get(viewer)
+            if seen is None or seen[0] != window:
+                seen = (window, {})
+                self.viewers[viewer] = seen
+            self.viewers.move_to_end(viewer)
+            while len(self.viewers) > MAX_VIEWERS:
+                self.viewers.popitem(last=False)
+        return seen[1]
+
+    def allowed(self, counts, advertiser):
+        return counts.get(advertiser, 0) < settings.AD_FREQUENCY_CAP
+
+    def record(self, counts, advertisers):
+        with self.lock:
+            for advertiser in advertisers:
+                counts[advertiser] = counts.get(advertiser, 0) + 1
+
+
+pool = AdPool()
+caps = FrequencyCaps()
+
+
+def invalidate_pool():
+    pool.invalidate()
+
+
+def weighted_sample(entries, count, allowed, rng=random):
+    """
+    Up to `count` entries drawn by weight without replacement, at most one
+    per advertiser and only advertisers for which allowed(client_id) is true.
+    """
+    keyed = sorted(
+        ((rng.random() ** (1.0 / entry['weight']), entry) for entry in entries if allowed(entry['client_id'])),
+        key=lambda pair: pair[0],
+        reverse=True,
+    )
+    chosen, advertisers = [], set()
+    for _, entry in keyed:
+        if entry['client_id'] in advertisers:
+            continue
+        chosen.append(entry)
+        advertisers.add(entry['client_id'])
+        if len(chosen) == count:
+            break
+    return chosen
+
+
+def serve(viewer, slot, count):
+    """Pick up to `count` ads for `viewer` and record the impressions against the caps."""
+    now = timezone.now()
+    entries = [entry for entry in pool.get() if entry['expires_at'] is None or entry['expires_at'] > now]
+    counts = caps.counts(viewer)
+    chosen = weighted_sample(entries, count, lambda advertiser: caps.allowed(counts, advertiser))
+    caps.record(counts, [entry['client_id'] for entry in chosen])
+
+    variant = SLOTS[slot]
+    return [
+        {
+            'id': entry['id'],
+            'title': entry['title'],
+            'description': entry['description'],
+            'link': entry['link'],
+            'client_name': entry['client__name'],
+            'image_url': entry['image_variants'].get(variant),
+        }
+        for entry in chosen
+    ]
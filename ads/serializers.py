@@ -1,7 +1,13 @@
+from django.core.files.uploadedfile import UploadedFile
 from rest_framework import serializers
+from rest_framework.exceptions import Throttled
 from .models import Ad
+from .images import DEFAULT_VARIANT, VARIANTS
+from .preprocess import ImageBusy, preprocess_upload
+from ajirinow.sparse import SparseFieldsetMixin
+from payments.serializers import PaymentStatusSerializer
 
-class AdSerializer(serializers.ModelSerializer):
+class AdSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     client_name = serializers.CharField(source='client.name', read_only=True)
     image_url = serializers.SerializerMethodField(read_only=True)
 
@@ -15,16 +21,47 @@ class AdSerializer(serializers.ModelSerializer):
             'description',
             'image',        # ✅ this enables uploads
             'image_url',    # ✅ this returns full URL
+            'image_status',
             'link',
             'is_active',
             'created_at',
             'expires_at'
         ]
-        read_only_fields = ['client', 'created_at']
+        read_only_fields = ['client', 'created_at', 'image_status']
+        # The column is nullable only while a deferred upload is pending.
+        extra_kwargs = {'image': {'required': True, 'allow_null': False}}
+        sparse_sources = {'image_url': ['image_variants', 'image']}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        params = getattr(request, 'query_params', {}) if request is not None else {}
+        self.image_size = params.get('size') or DEFAULT_VARIANT
+        if self.image_size not in VARIANTS:
+            raise serializers.ValidationError({'size': f"Expected one of: {', '.join(VARIANTS)}."})
+
+    def validate_image(self, value):
+        if isinstance(value, UploadedFile):
+            try:
+                return preprocess_upload(value)
+            except ImageBusy:
+                raise Throttled(detail="Too many images are being processed; try again shortly.")
+        return value
 
     def get_image_url(self, obj):
+        url = obj.image_variants.get(self.image_size) if obj.image_variants else None
+        if url:
+            return url
+        # Ads stored before variants were precomputed.
         request = self.context.get('request')
         if obj.image and request:
             return request.build_absolute_uri(obj.image.url).replace('http://', 'https://')
         return None
 
+
+class MyAdSerializer(AdSerializer):
+    """An ad as its owner sees it, with the payment that activates it (null until paid)."""
+    payment = PaymentStatusSerializer(read_only=True)
+
+    class Meta(AdSerializer.Meta):
+        fields = AdSerializer.Meta.fields + ['payment']
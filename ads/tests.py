@@ -7,6 +7,7 @@ from payments.models import Payment
 from ads.models import Ad
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
+from ads.uploads import process_pending as process_pending_uploads
 from datetime import timedelta
 
 class AdsTestCase(TestCase):
@@ -78,3 +79,313 @@ class AdsTestCase(TestCase):
         ad.refresh_from_db()
         self.assertFalse(ad.is_active)
 
+
+    def test_ad_list_sparse_fields_skip_image_url(self):
+        from unittest import mock
+        from ads.serializers import AdSerializer
+
+        Ad.objects.create(
+            client=self.user,
+            title="Cement sale",
+            description="Bags of cement",
+            image="ads/cement",
+            is_active=True,
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        with mock.patch.object(AdSerializer, "get_image_url") as get_image_url:
+            response = self.client.get("/api/ads/", {"fields": "id,title,client_name"})
+        get_image_url.assert_not_called()
+        self.assertEqual(response.data, [{"id": response.data[0]["id"], "title": "Cement sale", "client_name": "Ad Poster"}])
+
+    def test_ad_list_fast_path_matches_serializer(self):
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIRequestFactory
+        from ads.serializers import AdSerializer
+
+        Ad.objects.create(
+            client=self.user,
+            title="Cement sale",
+            description="Bags of cement",
+            image="ads/cement",
+            link="https://example.com",
+            is_active=True,
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        response = self.client.get("/api/ads/")
+        request = APIRequestFactory().get("/api/ads/")
+        expected = AdSerializer(Ad.objects.filter(is_active=True), many=True, context={"request": request}).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+        self.assertTrue(response.data[0]["image_url"].startswith("https://"))
+
+    def test_expired_ads_hidden_without_writes_until_swept(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        live = Ad.objects.create(
+            client=self.user, title="Live", description="d", image="ads/live",
+            is_active=True, expires_at=timezone.now() + timedelta(days=1)
+        )
+        stale = Ad.objects.create(
+            client=self.user, title="Stale", description="d", image="ads/stale",
+            is_active=True, expires_at=timezone.now() + timedelta(days=1)
+        )
+        Ad.objects.filter(pk=stale.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        # The listing filters by expires_at itself and no longer saves anything.
+        self.client.credentials()
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/ads/")
+        self.assertEqual([ad["title"] for ad in response.data], ["Live"])
+        stale.refresh_from_db()
+        self.assertTrue(stale.is_active)
+
+        out = StringIO()
+        call_command("expire_listings", stdout=out)
+        self.assertIn("ads: 1 expired", out.getvalue())
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertFalse(stale.is_active)
+        self.assertTrue(live.is_active)
+
+    def test_ad_image_variants_are_precomputed_and_picked_by_size(self):
+        import io
+        import tempfile
+        from PIL import Image
+        from unittest import mock
+        from cloudinary import CloudinaryResource
+        from django.test import override_settings
+
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            AD_IMAGE_BACKEND="ads.images.LocalImageBackend", AD_IMAGE_LOCAL_ROOT=media,
+            AD_IMAGE_LOCAL_URL="https://cdn.example.com/", AD_IMAGE_STAGING_ROOT=f"{media}/staging",
+        ):
+            png = io.BytesIO()
+            Image.new("RGBA", (40, 20), (255, 0, 0, 128)).save(png, "PNG")
+            image = SimpleUploadedFile("Banner.PNG", png.getvalue(), content_type="image/png")
+            response = self.client.post("/api/ads/", {
+                "title": "Banner", "description": "d", "image": image,
+            }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            process_pending_uploads()
+            ad = Ad.objects.get(title="Banner")
+            public_id = ad.image.public_id
+            self.assertEqual(ad.image_variants["full"], f"https://cdn.example.com/image/upload/{public_id}.png")
+            self.assertEqual(
+                ad.image_variants["thumbnail"],
+                f"https://cdn.example.com/image/upload/c_fill,g_auto,h_160,q_auto,w_160/{public_id}.jpg",
+            )
+
+            ad.is_active = True
+            ad.save()
+            Ad.objects.create(client=self.user, title="Cloud", description="d", image="ads/cloud",
+                              is_active=True, expires_at=timezone.now() + timedelta(days=1))
+            self.assertEqual(Ad.objects.get(title="Banner").image_variants["full"], ad.image_variants["full"])
+
+            with mock.patch.object(CloudinaryResource, "build_url") as build_url:
+                response = self.client.get("/api/ads/", {"size": "webp"})
+            build_url.assert_not_called()
+            self.assertEqual(
+                sorted(ad["image_url"].rpartition(".")[2] for ad in response.data), ["webp", "webp"]
+            )
+            response = self.client.get("/api/ads/mine/", {"size": "card"})
+            self.assertIn("/c_fill,g_auto,h_360,q_auto,w_640/", response.data[0]["image_url"])
+            self.assertEqual(self.client.get("/api/ads/", {"size": "huge"}).status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+    def test_ad_upload_is_validated_stripped_and_downsized(self):
+        import io
+        import os
+        import tempfile
+        from django.test import override_settings
+        from PIL import Image
+
+        photo = Image.new("RGB", (3000, 2000), "orange")
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotate 90 degrees
+        exif[0x010F] = "PhoneMaker"
+        buffer = io.BytesIO()
+        photo.save(buffer, "JPEG", quality=95, exif=exif)
+
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            AD_IMAGE_BACKEND="ads.images.LocalImageBackend", AD_IMAGE_LOCAL_ROOT=media,
+            AD_IMAGE_STAGING_ROOT=f"{media}/staging",
+        ):
+            response = self.client.post("/api/ads/", {
+                "title": "Photo", "description": "d",
+                "image": SimpleUploadedFile("photo.jpeg", buffer.getvalue(), content_type="image/jpeg"),
+            }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            process_pending_uploads()
+            ad = Ad.objects.get(title="Photo")
+            stored = os.path.join(media, f"{ad.image.public_id}.{ad.image.format}")
+            with Image.open(stored) as image:
+                self.assertEqual(image.format, "JPEG")
+                self.assertEqual(image.size, (1067, 1600))  # upright and within the limit
+                self.assertEqual(dict(image.getexif()), {})
+            self.assertLess(os.path.getsize(stored), len(buffer.getvalue()))
+
+            with override_settings(AD_IMAGE_MAX_PIXELS=1_000_000):
+                response = self.client.post("/api/ads/", {
+                    "title": "Huge", "description": "d",
+                    "image": SimpleUploadedFile("huge.jpg", buffer.getvalue(), content_type="image/jpeg"),
+                }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("pixels", str(response.data["image"]))
+
+            response = self.client.post("/api/ads/", {
+                "title": "Bogus", "description": "d",
+                "image": SimpleUploadedFile("bogus.jpg", b"not an image", content_type="image/jpeg"),
+            }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(Ad.objects.filter(title__in=["Huge", "Bogus"]).exists())
+
+    def test_ad_image_upload_is_deferred_and_retried(self):
+        import io
+        import os
+        import tempfile
+        from unittest import mock
+        from django.test import override_settings
+        from PIL import Image
+        from ads.images import LocalImageBackend
+        from ads.models import AdImageUpload
+
+        jpeg = io.BytesIO()
+        Image.new("RGB", (64, 48), "teal").save(jpeg, "JPEG")
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            AD_IMAGE_BACKEND="ads.images.LocalImageBackend", AD_IMAGE_LOCAL_ROOT=media,
+            AD_IMAGE_STAGING_ROOT=f"{media}/staging",
+        ):
+            with mock.patch.object(LocalImageBackend, "upload") as upload, \
+                    self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post("/api/ads/", {
+                    "title": "Deferred", "description": "d",
+                    "image": SimpleUploadedFile("a.jpg", jpeg.getvalue(), content_type="image/jpeg"),
+                }, format="multipart")
+            upload.assert_not_called()
+            self.assertEqual(len(callbacks), 1)  # wakes the upload worker
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["image_status"], "pending")
+            self.assertIsNone(response.data["image_url"])
+            pending = AdImageUpload.objects.get()
+            self.assertTrue(os.path.exists(os.path.join(media, "staging", pending.staged_name)))
+
+            # Paying for the ad while the image is still uploading.
+            ad = Ad.objects.get(title="Deferred")
+            ad.activate()
+            self.client.credentials()
+            self.assertEqual(self.client.get("/api/ads/").data, [])
+
+            with mock.patch.object(LocalImageBackend, "upload", side_effect=OSError("backend down")):
+                self.assertEqual(process_pending_uploads(), 1)
+            pending.refresh_from_db()
+            self.assertEqual((pending.attempts, pending.last_error), (1, "backend down"))
+            self.assertGreater(pending.retry_at, timezone.now())
+            self.assertEqual(process_pending_uploads(), 0)  # not due yet
+
+            AdImageUpload.objects.update(retry_at=timezone.now())
+            self.assertEqual(process_pending_uploads(), 1)
+            self.assertFalse(AdImageUpload.objects.exists())
+
+            ad.title = "Deferred, paid"
+            ad.save()  # a stale instance doesn't undo the upload
+            ad = Ad.objects.get(pk=ad.pk)
+            self.assertEqual((ad.title, ad.image_status), ("Deferred, paid", "ready"))
+            self.assertTrue(os.path.exists(os.path.join(media, f"{ad.image.public_id}.jpg")))
+            response = self.client.get("/api/ads/", {"size": "thumbnail"})
+            self.assertEqual([a["image_url"] for a in response.data], [ad.image_variants["thumbnail"]])
+
+            # A plain save of an ad whose row is gone still inserts it.
+            Ad.objects.filter(pk=ad.pk).delete()
+            ad.save()
+            self.assertEqual(Ad.objects.get(pk=ad.pk).image_variants, ad.image_variants)
+
+    def test_my_ads_embed_payment_status(self):
+        payment = Payment.objects.create(user=self.user, phone="254700000000", amount=50,
+                                         status="Completed", purpose="post_ad")
+        Ad.objects.create(client=self.user, title="Unpaid", description="d", image="ads/ad.jpg")
+        Ad.objects.create(client=self.user, title="Paid", description="d", image="ads/ad.jpg", payment=payment)
+
+        response = self.client.get("/api/ads/mine/")
+        payments = {ad["title"]: ad["payment"] for ad in response.data}
+        self.assertIsNone(payments["Unpaid"])
+        self.assertEqual(payments["Paid"]["status"], "Completed")
+        self.assertEqual(payments["Paid"]["purpose"], "post_ad")
+
+    def test_serve_ads_from_rotation_pool(self):
+        from django.test import override_settings
+        from ads import rotation
+
+        rotation.invalidate_pool()
+        rotation.caps.viewers.clear()
+        other = User.objects.create_user(
+            phone_number="0700333444", name="Other Poster", id_number="33334444",
+            password="adpass123", role="advertiser",
+        )
+        live = timezone.now() + timedelta(days=1)
+
+        def variants(name):
+            return {size: f"https://img.test/{size}/{name}.jpg" for size in ("thumbnail", "card", "full", "webp")}
+
+        Ad.objects.bulk_create([
+            Ad(client=self.user, title="A1", description="d", image_variants=variants("a1"),
+               is_active=True, expires_at=live, weight=5),
+            Ad(client=self.user, title="A2", description="d", image_variants=variants("a2"),
+               is_active=True, expires_at=live),
+            Ad(client=other, title="B1", description="d", image_variants=variants("b1"),
+               is_active=True, expires_at=live),
+            Ad(client=other, title="Muted", description="d", image_variants=variants("m"),
+               is_active=True, expires_at=live, weight=0),
+            Ad(client=other, title="Unpaid", description="d", image_variants=variants("u")),
+        ])
+        self.client.credentials()
+
+        with override_settings(AD_FREQUENCY_CAP=2):
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/ads/serve/", {"slot": "sidebar", "count": 10})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # One ad per advertiser per response.
+            self.assertEqual(len(response.data), 2)
+            served = {ad["title"] for ad in response.data}
+            self.assertIn("B1", served)
+            self.assertTrue({"A1", "A2"} & served)
+            b1 = next(ad for ad in response.data if ad["title"] == "B1")
+            self.assertEqual((b1["client_name"], b1["image_url"]), ("Other Poster", "https://img.test/thumbnail/b1.jpg"))
+
+            with self.assertNumQueries(0):
+                self.assertEqual(len(self.client.get("/api/ads/serve/", {"count": 10}).data), 2)
+            # Both advertisers have reached the cap for this viewer.
+            self.assertEqual(self.client.get("/api/ads/serve/", {"count": 10}).data, [])
+            # Another viewer isn't affected.
+            response = self.client.get("/api/ads/serve/", {"count": 10}, REMOTE_ADDR="10.0.0.9")
+            self.assertEqual(len(response.data), 2)
+
+            Ad.objects.filter(title="Muted").first().save()  # any save refreshes the pool
+            with self.assertNumQueries(1):
+                self.client.get("/api/ads/serve/", REMOTE_ADDR="10.0.0.10")
+
+        response = self.client.get("/api/ads/serve/", {"slot": "popup"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rotation_weighted_sample(self):
+        import random
+        from ads.rotation import weighted_sample
+
+        entries = [
+            {"id": 1, "client_id": 1, "weight": 1},
+            {"id": 2, "client_id": 2, "weight": 3},
+            {"id": 3, "client_id": 2, "weight": 3},
+            {"id": 4, "client_id": 3, "weight": 2},
+        ]
+        rng = random.Random(25)
+        wins = {1: 0, 2: 0, 3: 0, 4: 0}
+        for _ in range(9000):
+            (entry,) = weighted_sample(entries, 1, lambda advertiser: True, rng)
+            wins[entry["id"]] += 1
+        for ad_id, weight in ((1, 1), (2, 3), (3, 3), (4, 2)):
+            self.assertAlmostEqual(wins[ad_id] / 9000, weight / 9, delta=0.02)
+
+        picked = weighted_sample(entries, 3, lambda advertiser: advertiser != 3, rng)
+        self.assertEqual(len(picked), 2)
+        self.assertEqual(sorted(entry["client_id"] for entry in picked), [1, 2])
@@ -0,0 +1,115 @@
+"""
+Deferred ad image uploads.
+
+Creating an ad doesn't wait on the image backend: Ad.save() writes the
+(already preprocessed) file to local staging storage under
+AD_IMAGE_STAGING_ROOT, saves the ad with image_status=pending and queues an
+AdImageUpload row. After commit a worker thread (see ajirinow.worker) pushes
+the file to the image backend, stores the resource and its variant URLs on
+the ad and deletes the staged copy. A failed push is retried with
+exponential backoff; after MAX_ATTEMPTS the ad is marked failed.
+
+Staging is local disk, so every process that may run the worker needs to
+see the same directory. Set AD_IMAGE_UPLOAD_WORKER=0 to keep the thread out
+of web processes and run `manage.py upload_ad_images --loop` instead.
+"""
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from ajirinow.worker import QueueWorker
+
+from .images import image_backend
+from .models import Ad, AdImageUpload
+from .rotation import invalidate_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 30
+
+
+def staging_storage():
+    return FileSystemStorage(location=settings.AD_IMAGE_STAGING_ROOT)
+
+
+def stage_image(upload):
+    """Save an uploaded file to staging; returns its name there."""
+    extension = os.path.splitext(upload.name)[1].lower()
+    upload.seek(0)
+    return staging_storage().save(f'{uuid.uuid4().hex}{extension}', upload)
+
+
+def enqueue_upload(ad, staged_name):
+    """Queue the push of `staged_name` for `ad` (replacing any pending one) and wake the worker after commit."""
+    previous = AdImageUpload.objects.filter(ad=ad).values_list('staged_name', flat=True).first()
+    AdImageUpload.objects.update_or_create(ad=ad, defaults={
+        'staged_name': staged_name, 'attempts': 0, 'retry_at': timezone.now(), 'last_error': '',
+    })
+    if previous and previous != staged_name:
+        transaction.on_commit(lambda: staging_storage().delete(previous))
+    if settings.AD_IMAGE_UPLOAD_WORKER:
+        transaction.on_commit(wake_worker)
+
+
+def push(upload):
+    """Upload the staged file and store it on the ad. Raises whatever the backend raises."""
+    backend = image_backend()
+    with staging_storage().open(upload.staged_name) as staged:
+        resource = backend.upload(File(staged, name=os.path.basename(upload.staged_name)))
+    Ad.objects.filter(pk=upload.ad_id).update(
+        image=resource.get_prep_value(),
+        image_variants=backend.variant_urls(resource),
+        image_status=Ad.IMAGE_READY,
+    )
+    # update() sends no post_save.
+    transaction.on_commit(invalidate_pool)
+
+
+def process_next():
+    """Claim and push one due upload. Returns False when none is due."""
+    with transaction.atomic():
+        upload = (
+            AdImageUpload.objects.select_for_update(skip_locked=True)
+            .filter(retry_at__lte=timezone.now(), attempts__lt=MAX_ATTEMPTS)
+            .order_by('retry_at')
+            .first()
+        )
+        if upload is None:
+            return False
+        try:
+            with transaction.atomic():
+                push(upload)
+        except Exception as exc:
+            logger.exception("Uploading the image of ad %s failed", upload.ad_id)
+            upload.attempts += 1
+            upload.last_error = str(exc)
+            upload.retry_at = timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** upload.attempts)
+            upload.save(update_fields=['attempts', 'last_error', 'retry_at'])
+            if upload.attempts >= MAX_ATTEMPTS:
+                Ad.objects.filter(pk=upload.ad_id).update(image_status=Ad.IMAGE_FAILED)
+            return True
+
+        staged_name = upload.staged_name
+        upload.delete()
+        transaction.on_commit(lambda: staging_storage().delete(staged_name))
+    return True
+
+
+def process_pending(limit=None):
+    """Push due uploads until none is left (or `limit` have been tried). Returns the count."""
+    count = 0
+    while (limit is None or count < limit) and process_next():
+        count += 1
+    return count
+
+
+worker = QueueWorker('ad-image-upload-worker', process_pending, 'AD_IMAGE_UPLOAD_POLL_INTERVAL')
+wake_worker = worker.wake
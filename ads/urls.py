@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import AdListCreateView, AdDetailView, MyAdsView
+from .views import AdListCreateView, AdDetailView, AdServeView, MyAdsView
 
 urlpatterns = [
     path('', AdListCreateView.as_view(), name='ad-list-create'),
+    path('serve/', AdServeView.as_view(), name='ad-serve'),
     path('mine/', MyAdsView.as_view(), name='my-ads'),
     path('<int:pk>/', AdDetailView.as_view(), name='ad-detail'),
 ]
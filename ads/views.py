@@ -1,23 +1,29 @@
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
 from .models import Ad
-from .serializers import AdSerializer
+from . import rotation
+from .serializers import AdSerializer, MyAdSerializer
+from ajirinow.fastpath import FastListMixin
+from ajirinow.sparse import SparseQuerysetMixin
 
 
-from django.utils import timezone
-
-class AdListCreateView(generics.ListCreateAPIView):
+class AdListCreateView(FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
+    """
+    GET: Active ads. `fields=a,b` / `exclude=c` return only some fields.
+    POST: Create an ad. It stays inactive until payment is made.
+    """
     queryset = Ad.objects.all()
     serializer_class = AdSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        # Deactivate expired ads before returning
-        expired_ads = Ad.objects.filter(is_active=True, expires_at__lt=timezone.now())
-        for ad in expired_ads:
-            ad.is_active = False
-            ad.save()
-
-        return Ad.objects.filter(is_active=True)
+        # Expired ads are filtered out here; expire_listings flips their flag later.
+        # Ads whose image is still uploading wait until it is stored.
+        return self.narrow_queryset(
+            Ad.objects.live().filter(image_status=Ad.IMAGE_READY).select_related('client')
+        )
 
     def perform_create(self, serializer):
         serializer.save(client=self.request.user)
@@ -26,17 +32,19 @@ class AdListCreateView(generics.ListCreateAPIView):
         return {'request': self.request}
 
 
-class MyAdsView(generics.ListAPIView):
+class MyAdsView(SparseQuerysetMixin, generics.ListAPIView):
     """
-    GET: List ads posted by the authenticated user.
+    GET: List ads posted by the authenticated user, each with its `payment`
+    status, purpose and post_expiry_date (null until paid).
+    `fields=a,b` / `exclude=c` return only some fields.
     """
-    serializer_class = AdSerializer
+    serializer_class = MyAdSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Ad.objects.none()
-        return Ad.objects.filter(client=self.request.user)
+        return self.narrow_queryset(Ad.objects.filter(client=self.request.user).select_related('client', 'payment'))
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -58,3 +66,29 @@ class AdDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_serializer_context(self):
         return {'request': self.request}
 
+
+
+class AdServeView(APIView):
+    """
+    GET: Up to `count` (default 1, max 10) ads to show in `slot` (banner,
+    feed or sidebar; default feed), drawn by weight from the in-memory
+    rotation pool, at most one per advertiser and subject to the
+    per-advertiser frequency cap. `image_url` is the slot's image variant.
+    """
+    permission_classes = [permissions.AllowAny]
+    max_count = 10
+
+    def get(self, request):
+        slot = request.query_params.get("slot") or rotation.DEFAULT_SLOT
+        if slot not in rotation.SLOTS:
+            return Response({"error": f"slot must be one of: {', '.join(rotation.SLOTS)}"}, status=400)
+        try:
+            count = max(1, min(int(request.query_params.get("count", 1)), self.max_count))
+        except ValueError:
+            return Response({"error": "count must be a number"}, status=400)
+
+        if request.user.is_authenticated:
+            viewer = f'user:{request.user.pk}'
+        else:
+            viewer = f'ip:{BaseThrottle().get_ident(request)}'
+        return Response(rotation.serve(viewer, slot, count))
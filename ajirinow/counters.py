@@ -0,0 +1,168 @@
+"""
+Write-behind counters: job views, fundi profile views and contact reveals.
+
+Read paths call Counter.increment(), which only bumps an in-process dict
+under a lock. flush_counters() then writes everything buffered with one
+statement per (counter, day, amount):
+
+    INSERT INTO <rollup> (<target>_id, day, <field>)
+    SELECT id, <day>, <n> FROM <target table> WHERE <key> = ANY(<keys>)
+    ON CONFLICT (<target>_id, day) DO UPDATE SET <field> = <rollup>.<field> + EXCLUDED.<field>
+
+so a thousand views of one job between flushes cost one row update, and
+rows deleted in the meantime are skipped. Totals are sums of the daily rows;
+keeping counts off Job and FundiProfile themselves means a full save() of
+either can't overwrite increments that landed in between.
+
+The first increment in a process starts a flusher thread that writes the
+buffer every COUNTER_FLUSH_INTERVAL seconds (0 disables it; call
+flush_counters() yourself then), and again at exit. gunicorn.conf.py starts
+it at worker boot and flushes when the worker exits. Counts still buffered
+in a process that is killed are lost, and so are increments that arrive
+while MAX_BUFFERED distinct (counter, day, key) entries are waiting, e.g.
+while the database is down; those are logged at the next flush.
+
+Counting isn't free: in bench_counters runs a buffered job detail GET had
+a p50 0.1-0.16 ms (2-5%) above an uncounted one, against 0.8-1 ms for a
+write per view.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAX_BUFFERED = 100_000
+
+_counts = defaultdict(int)
+_dropped = 0
+_lock = threading.Lock()
+
+
+class Counter:
+    """
+    One counted column of a daily rollup model.
+
+    `rollup` has a ForeignKey named `target`, a `day` DateField and `field`,
+    with a unique constraint on (target, day). Increments are keyed by the
+    target's `key` column, so a view that only knows a user id can still
+    count against that user's profile.
+    """
+
+    def __init__(self, rollup, field, target, key='id'):
+        self.rollup = rollup
+        self.field = field
+        self.target = target
+        self.key = key
+
+    def __repr__(self):
+        return f'<Counter {self.rollup._meta.label}.{self.field}>'
+
+    def increment(self, key, n=1):
+        global _dropped
+        if _flusher is None:
+            start_flusher()
+        entry = (self, timezone.localdate(), key)
+        with _lock:
+            if entry in _counts or len(_counts) < MAX_BUFFERED:
+                _counts[entry] += n
+            else:
+                _dropped += n
+
+    @property
+    def sql(self):
+        qn = connection.ops.quote_name
+        rollup = self.rollup._meta
+        fk = rollup.get_field(self.target)
+        target = fk.related_model._meta
+        field = qn(rollup.get_field(self.field).column)
+        return (
+            f"INSERT INTO {qn(rollup.db_table)} ({qn(fk.column)}, day, {field}) "
+            f"SELECT {qn(target.pk.column)}, %s, %s FROM {qn(target.db_table)} "
+            f"WHERE {qn(target.get_field(self.key).column)} = ANY(%s) "
+            f"ON CONFLICT ({qn(fk.column)}, day) "
+            f"DO UPDATE SET {field} = {qn(rollup.db_table)}.{field} + EXCLUDED.{field}"
+        )
+
+
+def flush_counters():
+    """Write all buffered increments. Returns how many were written."""
+    global _counts, _dropped
+    with _lock:
+        counts, _counts = _counts, defaultdict(int)
+        dropped, _dropped = _dropped, 0
+    if dropped:
+        logger.warning("Counter buffer was full; dropped %d increments", dropped)
+    if not counts:
+        return 0
+
+    groups = defaultdict(list)
+    for (counter, day, key), n in counts.items():
+        groups[counter, day, n].append(key)
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for (counter, day, n), keys in groups.items():
+                cursor.execute(counter.sql, [day, n, sorted(keys)])
+    except Exception:
+        # Put them back for the next flush, as far as the buffer has room.
+        with _lock:
+            for entry, n in counts.items():
+                if entry in _counts or len(_counts) < MAX_BUFFERED:
+                    _counts[entry] += n
+                else:
+                    _dropped += n
+        raise
+    return sum(counts.values())
+
+
+def counter_totals(queryset, fields, days):
+    """
+    {field: total, ..., 'daily': [{'day', field, ...}]} from daily rollup rows,
+    with the last `days` days listed oldest first.
+    """
+    totals = queryset.aggregate(**{field: Sum(field, default=0) for field in fields})
+    since = timezone.localdate() - timedelta(days=days - 1)
+    totals['daily'] = list(queryset.filter(day__gte=since).order_by('day').values('day', *fields))
+    return totals
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_logged():
+    try:
+        flush_counters()
+    except Exception:
+        logger.exception("Counter flush failed")
+
+
+def start_flusher():
+    """
+    Flush every COUNTER_FLUSH_INTERVAL seconds in a daemon thread, and at exit
+    (once per process). Does nothing while the interval is 0.
+    """
+    global _flusher
+    with _flusher_lock:
+        if _flusher is not None or not settings.COUNTER_FLUSH_INTERVAL:
+            return _flusher
+
+        def run():
+            while True:
+                time.sleep(settings.COUNTER_FLUSH_INTERVAL or 1)
+                if settings.COUNTER_FLUSH_INTERVAL:
+                    _flush_logged()
+                    close_old_connections()
+
+        _flusher = threading.Thread(target=run, name='counter-flusher', daemon=True)
+        _flusher.start()
+        atexit.register(_flush_logged)
+    return _flusher
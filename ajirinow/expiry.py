@@ -0,0 +1,88 @@
+"""
+Expiry for paid listings (jobs, ads) and fundi subscriptions.
+
+Reads never depend on a sweep having run: listing views use `live()`,
+which checks `expires_at` in the query, and fundi visibility
+(`accounts.models.visible_fundi_q`) compares `visible_until` with now().
+`expire_listings()` then flips `is_active` (and `User.is_visible`) with one
+UPDATE per table so the flags catch up and purges feed and inbox rows of
+inactive jobs. Run it from cron via `manage.py expire_listings`, or set
+EXPIRY_SWEEP_INTERVAL to have each web process run it in a background
+thread.
+"""
+import logging
+import threading
+import time
+
+from django.db import close_old_connections, models
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiringQuerySet(models.QuerySet):
+    def live(self):
+        """Active rows whose `expires_at` is unset or still ahead."""
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()), is_active=True)
+
+    def deactivate_expired(self):
+        return self.filter(is_active=True, expires_at__lte=timezone.now()).update(is_active=False)
+
+
+def expire_listings():
+    """
+    Deactivate expired jobs and ads, drop feed postings and inbox rows of
+    inactive jobs and hide lapsed fundis. Returns {kind: (count, seconds)}.
+    """
+    from accounts.cache import invalidate_fundi_directory
+    from accounts.models import User
+    from ads.models import Ad
+    from jobs.models import InboxItem, Job, JobTerm
+
+    def purge_job_terms():
+        # Feed postings of jobs that are no longer active.
+        return JobTerm.objects.filter(job__is_active=False).delete()[0]
+
+    def purge_inbox_items():
+        return InboxItem.objects.filter(job__is_active=False).delete()[0]
+
+    results = {}
+    for kind, expire in (
+        ('jobs', Job.objects.deactivate_expired),
+        ('job terms', purge_job_terms),
+        ('inbox items', purge_inbox_items),
+        ('ads', Ad.objects.deactivate_expired),
+        ('subscriptions', User.objects.hide_lapsed),
+    ):
+        started = time.monotonic()
+        count = expire()
+        results[kind] = (count, time.monotonic() - started)
+
+    if results['subscriptions'][0]:
+        invalidate_fundi_directory()
+    return results
+
+
+_scheduler = None
+
+
+def start_scheduler(interval):
+    """Run expire_listings() every `interval` seconds in a daemon thread (once per process)."""
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                expire_listings()
+            except Exception:
+                logger.exception("Expiry sweep failed")
+            finally:
+                close_old_connections()
+
+    _scheduler = threading.Thread(target=run, name='expiry-scheduler', daemon=True)
+    _scheduler.start()
+    return _scheduler
@@ -0,0 +1,60 @@
+"""
+Offline geocoding of Kenyan counties and towns.
+
+Places come from the bundled data/kenya_places.csv, so lookups never leave the
+process. Towns win over counties when a location mentions both
+("Westlands, Nairobi" resolves to Westlands).
+"""
+import csv
+import re
+from functools import lru_cache
+from pathlib import Path
+
+DATA_FILE = Path(__file__).resolve().parent / 'data' / 'kenya_places.csv'
+
+_NOISE_RE = re.compile(r"['’.]")
+_SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
+_STOPWORDS = {'county', 'town', 'city', 'area', 'estate', 'near', 'kenya', 'cbd'}
+
+
+def normalize_place(value):
+    words = _SEPARATOR_RE.sub(' ', _NOISE_RE.sub('', (value or '').lower())).split()
+    return ' '.join(word for word in words if word not in _STOPWORDS)
+
+
+@lru_cache(maxsize=1)
+def load_places():
+    """{normalized name: (latitude, longitude, kind)} for every bundled place."""
+    places = {}
+    with open(DATA_FILE, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            key = normalize_place(row['name'])
+            # Keep the town when a town and a county share a name.
+            if key in places and places[key][2] == 'town':
+                continue
+            places[key] = (float(row['latitude']), float(row['longitude']), row['kind'])
+    return places
+
+
+def geocode(location):
+    """Return (latitude, longitude) for a free-text Kenyan location, or None."""
+    places = load_places()
+    text = normalize_place(location)
+    if not text:
+        return None
+    if text in places:
+        return places[text][:2]
+
+    # Try every one-to-three word phrase, preferring towns, then earlier phrases.
+    words = text.split()
+    best = None
+    for size in (3, 2, 1):
+        for start in range(len(words) - size + 1):
+            place = places.get(' '.join(words[start:start + size]))
+            if place is None:
+                continue
+            if place[2] == 'town':
+                return place[:2]
+            if best is None:
+                best = place[:2]
+    return best
@@ -0,0 +1,161 @@
+"""
+Geohash bucketing and haversine distance for "near me" queries.
+
+Rows store a geohash of their coordinates. A radius query first keeps rows in
+the 3x3 block of cells around the centre (an indexed prefix match), then
+computes the exact great-circle distance in SQL for what is left.
+"""
+import math
+from functools import reduce
+from operator import or_
+
+from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+
+from .gazetteer import geocode
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+MAX_RADIUS_KM = 200
+DEFAULT_RADIUS_KM = 10
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    value = bits = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (bounds[0] + bounds[1]) / 2
+        if coordinate >= mid:
+            value = value * 2 + 1
+            bounds[0] = mid
+        else:
+            value = value * 2
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            value = bits = 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of a geohash cell at `precision`."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def geohash_cover(latitude, longitude, radius_km):
+    """
+    Prefixes of the 3x3 cells around the centre, at the finest precision whose
+    cells are still at least `radius_km` across, so the circle fits inside.
+    """
+    km_per_degree_lon = 111.32 * max(math.cos(math.radians(latitude)), 0.01)
+    precision = 0
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size_degrees(candidate)
+        if height * 111.32 < radius_km or width * km_per_degree_lon < radius_km:
+            break
+        precision = candidate
+    if precision == 0:
+        return []
+
+    height, width = cell_size_degrees(precision)
+    cells = set()
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            lat = max(min(latitude + dy * height, 89.999999), -89.999999)
+            lon = (longitude + dx * width + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def distance_km_expression(latitude, longitude, prefix=''):
+    """The haversine formula as a database expression."""
+    row_lat = F(f'{prefix}latitude')
+    row_lon = F(f'{prefix}longitude')
+    a = (
+        Power(Sin(Radians(row_lat - Value(latitude)) / 2), 2)
+        + Cos(Radians(Value(latitude))) * Cos(Radians(row_lat))
+        * Power(Sin(Radians(row_lon - Value(longitude)) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Value(1.0), Sqrt(a)))
+
+
+def filter_near(queryset, latitude, longitude, radius_km, prefix=''):
+    """Rows within `radius_km`, annotated with distance_km and nearest first."""
+    cells = geohash_cover(latitude, longitude, radius_km)
+    if cells:
+        queryset = queryset.filter(reduce(or_, (Q(**{f'{prefix}geohash__startswith': cell}) for cell in cells)))
+    else:
+        queryset = queryset.exclude(**{f'{prefix}geohash': ''})
+    return (
+        queryset.annotate(distance_km=distance_km_expression(latitude, longitude, prefix))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km')
+    )
+
+
+def parse_near(query_params):
+    """
+    Read `near=lat,lon` and `radius_km` from a request's query string.
+    Returns None when `near` is absent.
+    """
+    near = query_params.get('near')
+    if not near:
+        return None
+    try:
+        latitude, longitude = (float(part) for part in near.split(','))
+    except ValueError:
+        raise ValidationError({'near': 'Expected near=<latitude>,<longitude>.'})
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValidationError({'near': 'Coordinates out of range.'})
+
+    try:
+        radius_km = float(query_params.get('radius_km', DEFAULT_RADIUS_KM))
+    except ValueError:
+        raise ValidationError({'radius_km': 'Expected a number of kilometres.'})
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValidationError({'radius_km': f'Must be between 0 and {MAX_RADIUS_KM}.'})
+    return latitude, longitude, radius_km
+
+
+class GeoLocatedModel(models.Model):
+    """
+    Optional coordinates for a model with a free-text `location`.
+
+    When no coordinates are given, save() geocodes `location` offline; either
+    way it keeps `geohash` in step for radius queries.
+    """
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=GEOHASH_PRECISION, blank=True, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def update_geo(self):
+        if self.latitude is None or self.longitude is None:
+            self.latitude, self.longitude = geocode(self.location) or (None, None)
+        if self.latitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+
+
+class GeoLocatedSerializerMixin:
+    """Re-geocode on save when `location` changes without new coordinates."""
+
+    def update(self, instance, validated_data):
+        moved = validated_data.get('location', instance.location) != instance.location
+        if moved and 'latitude' not in validated_data and 'longitude' not in validated_data:
+            validated_data['latitude'] = validated_data['longitude'] = None
+        return super().update(instance, validated_data)
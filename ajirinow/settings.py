@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     #my apps
     'rest_framework',
@@ -110,6 +111,27 @@ else:
     }
 
 
+# Cache
+# Set REDIS_URL (and install `redis`) to share the cache between gunicorn workers.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a cached public fundi directory page may be served. Writes invalidate
+# it immediately; this bounds how long a lapsed trial/subscription stays listed.
+FUNDI_DIRECTORY_CACHE_TIMEOUT = int(os.environ.get("FUNDI_DIRECTORY_CACHE_TIMEOUT", 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -161,10 +183,47 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
+    ],
+    # orjson-backed when `pip install orjson` has been run, stdlib json otherwise.
+    'DEFAULT_RENDERER_CLASSES': [
+        'ajirinow.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'ajirinow.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# Seconds between in-process expiry sweeps (ajirinow.expiry); 0 leaves it to
+# `manage.py expire_listings` on a cron.
+EXPIRY_SWEEP_INTERVAL = int(os.getenv('EXPIRY_SWEEP_INTERVAL', 0))
+
+# New-job notifications (jobs.notifications): run the fan-out worker inside
+# web processes, and how often (seconds) it re-checks the queue when idle.
+JOB_NOTIFY_WORKER = os.getenv('JOB_NOTIFY_WORKER', '1') == '1'
+JOB_NOTIFY_POLL_INTERVAL = int(os.getenv('JOB_NOTIFY_POLL_INTERVAL', 30))
+# How far (km) from a geocoded job its fundis are notified.
+JOB_NOTIFY_RADIUS_KM = float(os.getenv('JOB_NOTIFY_RADIUS_KM', 30))
+
+# Seconds between flushes of buffered view/contact-reveal counters
+# (ajirinow.counters) in each process; 0 leaves flushing to explicit
+# flush_counters() calls.
+COUNTER_FLUSH_INTERVAL = int(os.getenv('COUNTER_FLUSH_INTERVAL', 10))
+
+# Upper bound on ?page_size for the public client list.
+CLIENT_LIST_MAX_PAGE_SIZE = int(os.getenv('CLIENT_LIST_MAX_PAGE_SIZE', 100))
+
+# Token -> user lookups cached by CachedTokenAuthentication. SHARED keeps them in
+# CACHES['default'] (use with REDIS_URL) instead of a per-process LRU.
+TOKEN_AUTH_CACHE = {
+    'SHARED': os.environ.get("TOKEN_AUTH_CACHE_SHARED") == "true",
+    'TTL': int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 60)),
+    'MAX_ENTRIES': 10000,
+}
+
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.environ.get('CLOUDINARY_CLOUD_NAME'),
     'API_KEY': os.environ.get('CLOUDINARY_API_KEY'),
@@ -173,6 +232,34 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Where ad images (and their precomputed variant URLs) come from: Cloudinary,
+# or 'ads.images.LocalImageBackend' to keep files on disk with no network.
+AD_IMAGE_BACKEND = os.getenv('AD_IMAGE_BACKEND', 'ads.images.CloudinaryImageBackend')
+AD_IMAGE_LOCAL_ROOT = os.getenv('AD_IMAGE_LOCAL_ROOT', os.path.join(BASE_DIR, 'media'))
+AD_IMAGE_LOCAL_URL = os.getenv('AD_IMAGE_LOCAL_URL', '/media/')
+
+# New ad images are staged on local disk and pushed to the backend by a
+# background worker (ads.uploads); 0 uploads them inside the request.
+AD_IMAGE_DEFERRED_UPLOAD = os.getenv('AD_IMAGE_DEFERRED_UPLOAD', '1') == '1'
+AD_IMAGE_STAGING_ROOT = os.getenv('AD_IMAGE_STAGING_ROOT', os.path.join(BASE_DIR, 'media', 'staging'))
+AD_IMAGE_UPLOAD_WORKER = os.getenv('AD_IMAGE_UPLOAD_WORKER', '1') == '1'
+AD_IMAGE_UPLOAD_POLL_INTERVAL = int(os.getenv('AD_IMAGE_UPLOAD_POLL_INTERVAL', 30))
+
+# Ad uploads are validated and re-encoded before storage (ads.preprocess).
+AD_IMAGE_MAX_UPLOAD_BYTES = int(os.getenv('AD_IMAGE_MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+AD_IMAGE_MAX_PIXELS = int(os.getenv('AD_IMAGE_MAX_PIXELS', 40_000_000))
+AD_IMAGE_MAX_DIMENSION = int(os.getenv('AD_IMAGE_MAX_DIMENSION', 1600))
+AD_IMAGE_JPEG_QUALITY = int(os.getenv('AD_IMAGE_JPEG_QUALITY', 82))
+AD_IMAGE_WORKERS = int(os.getenv('AD_IMAGE_WORKERS', 2))
+
+# /api/ads/serve/ picks from an in-process pool of live ads (ads.rotation),
+# rebuilt every AD_POOL_REFRESH_INTERVAL seconds or after an Ad is saved.
+# A viewer sees at most AD_FREQUENCY_CAP ads from one advertiser per
+# AD_FREQUENCY_WINDOW seconds (counted per process).
+AD_POOL_REFRESH_INTERVAL = int(os.getenv('AD_POOL_REFRESH_INTERVAL', 30))
+AD_FREQUENCY_CAP = int(os.getenv('AD_FREQUENCY_CAP', 3))
+AD_FREQUENCY_WINDOW = int(os.getenv('AD_FREQUENCY_WINDOW', 3600))
+
 
 #MEDIA_URL = '/media/'
 #MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
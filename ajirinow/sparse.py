@@ -0,0 +1,88 @@
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_field_list(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+class SparseFieldsetMixin:
+    """
+    Let GET requests pick fields with `?fields=a,b` or drop them with `?exclude=c`.
+
+    Unrequested fields are removed from the serializer before representation,
+    so method fields and nested serializers behind them are never evaluated.
+    Only the top-level serializer reads the query string; nested serializers
+    are left whole. Unknown names are ignored.
+
+    `Meta.sparse_sources` maps fields whose model columns can't be derived
+    from `source` (e.g. SerializerMethodFields) to the lookups they read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        params = getattr(request, 'query_params', request.GET)
+        fields = parse_field_list(params.get(FIELDS_PARAM))
+        exclude = parse_field_list(params.get(EXCLUDE_PARAM))
+        if not fields and not exclude:
+            return
+
+        self.sparse = True
+        for name in list(self.fields):
+            if (fields and name not in fields) or name in exclude:
+                self.fields.pop(name)
+
+    def get_only_fields(self):
+        """
+        Model lookups needed to render the remaining fields, for
+        `QuerySet.only()`, or None if some field can't be mapped.
+        """
+        sparse_sources = getattr(self.Meta, 'sparse_sources', {})
+        lookups = set()
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in sparse_sources:
+                lookups.update(sparse_sources[name])
+            elif isinstance(field, serializers.BaseSerializer):
+                if not hasattr(field, 'get_only_fields'):
+                    return None
+                nested = field.get_only_fields()
+                if nested is None:
+                    return None
+                prefix = '__'.join(field.source_attrs)
+                lookups.update(f'{prefix}__{lookup}' for lookup in nested)
+            elif field.source == '*':
+                return None
+            else:
+                lookups.add('__'.join(field.source_attrs))
+        return lookups
+
+
+class SparseQuerysetMixin:
+    """
+    For list views whose serializer uses SparseFieldsetMixin: when the
+    request narrows the fields, only load the matching columns.
+    """
+
+    def narrow_queryset(self, queryset):
+        serializer = self.get_serializer()
+        if not getattr(serializer, 'sparse', False):
+            return queryset
+        lookups = serializer.get_only_fields()
+        if lookups is None:
+            return queryset
+        # Keyset cursors read the ordering columns off the last row.
+        lookups |= {field.lstrip('-') for field in getattr(self.paginator, 'ordering', ())}
+        # Deferred relations can't stay in select_related, so join only the ones still rendered.
+        queryset = queryset.select_related(None)
+        relations = {lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup}
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*lookups)
@@ -0,0 +1,49 @@
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import User
+from payments.models import Payment
+
+
+class RendererTests(TestCase):
+    def test_fast_json_renderer_matches_stdlib(self):
+        import io
+        from decimal import Decimal
+        from unittest import mock
+        from zoneinfo import ZoneInfo
+        from cloudinary import CloudinaryResource
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from ajirinow.renderers import FastJSONParser, FastJSONRenderer, JSONEncoder
+
+        user = User.objects.create_user(phone_number="0700000000", name="Test User", id_number="12345678",
+                                        password="password", role="client")
+        payment = Payment.objects.create(
+            user=user, phone="254700000000", amount=100,
+            merchant_request_id="m", checkout_request_id="c", status="Completed", purpose="post_job",
+        )
+        payment.refresh_from_db()
+        data = {
+            "amount": Decimal("200.50"),
+            "created_at": payment.created_at,
+            "nairobi": timezone.localtime(payment.created_at, ZoneInfo("Africa/Nairobi")),
+            "post_expiry_date": payment.post_expiry_date,
+            "image": CloudinaryResource(public_id="ads/cement", format="jpg", version="1", type="upload", resource_type="image"),
+            "label": gettext_lazy("Pending"),
+            "note": "Kazi\u2028ipo – Meru",
+            3: [None, True, 1.5],
+        }
+
+        class StdlibRenderer(JSONRenderer):
+            encoder_class = JSONEncoder
+
+        expected = StdlibRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertIn(b'"amount":200.5', expected)
+        self.assertIn(b'"image":"image/upload/v1/ads/cement.jpg"', expected)
+        self.assertIn(b'+03:00"', expected)
+        with mock.patch("ajirinow.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+        parsed = FastJSONParser().parse(io.BytesIO(expected))
+        self.assertEqual(parsed["note"], "Kazi\u2028ipo – Meru")
+        self.assertEqual(parsed["amount"], 200.5)
@@ -0,0 +1,52 @@
+"""
+In-process worker threads for database-backed queues.
+
+A queue is a table of pending rows plus a `drain()` function that claims
+and processes them (with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+of processes can share it). Code that queues a row calls wake() once its
+transaction commits; the thread also polls every `poll_interval` seconds so
+rows left over from a restart, waiting out a retry, or queued by a process
+without a worker, still get processed. gunicorn.conf.py calls start() in
+each worker process for the queues that are enabled, so that polling
+doesn't wait for the first wake().
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    def __init__(self, name, drain, poll_interval_setting):
+        self.name = name
+        self.drain = drain
+        self.poll_interval_setting = poll_interval_setting
+        self.thread = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def start(self):
+        """Start the thread (once per process); it drains the queue straight away."""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def wake(self):
+        """Nudge the thread to check the queue, starting it on first use."""
+        self.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(getattr(settings, self.poll_interval_setting))
+            self.wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("%s failed", self.name)
+            finally:
+                close_old_connections()
@@ -0,0 +1,29 @@
+# Picked up automatically by `gunicorn ajirinow.wsgi` (Procfile, render.yml).
+import os
+
+# Threaded workers keep heartbeating to the arbiter while a request runs, so
+# long streaming exports (/api/payments/export/ etc.) don't hit the timeout.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+
+def post_worker_init(worker):
+    # Buffered view/contact-reveal counters (ajirinow.counters).
+    from django.conf import settings
+    from ajirinow.counters import start_flusher
+    start_flusher()
+
+    # Queue workers poll from boot, so rows left by a restart or waiting out
+    # a retry are picked up without waiting for a new enqueue.
+    if settings.JOB_NOTIFY_WORKER:
+        from jobs.notifications import worker as job_notify_worker
+        job_notify_worker.start()
+    if settings.AD_IMAGE_UPLOAD_WORKER:
+        from ads.uploads import worker as ad_upload_worker
+        ad_upload_worker.start()
+
+
+def worker_exit(server, worker):
+    from ajirinow.counters import flush_counters
+    flush_counters()
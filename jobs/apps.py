@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from django.conf import settings
+
+        if settings.EXPIRY_SWEEP_INTERVAL:
+            from ajirinow.expiry import start_scheduler
+            start_scheduler(settings.EXPIRY_SWEEP_INTERVAL)
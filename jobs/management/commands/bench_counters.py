@@ -0,0 +1,105 @@
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from ajirinow.counters import Counter, flush_counters
+from jobs.models import Job
+from jobs.views import JOB_VIEWS, JobRetrieveUpdateDeleteView
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test job detail GETs with no view counting, buffered counters and a "
+        "write per view. Rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=3000)
+        parser.add_argument('--threads', type=int, default=4)
+
+    # The rows are never committed, so a background flush would lose the counts.
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def handle(self, *args, **options):
+        flush_counters()
+        with transaction.atomic():
+            client = User.objects.create_user(phone_number='0799999997', name='Bench Client', id_number='0', role='client')
+            fundi = User.objects.create_user(phone_number='0799999996', name='Bench Fundi', id_number='1', role='fundi')
+            expires_at = timezone.now() + timedelta(weeks=12)
+            job_ids = [job.id for job in Job.objects.bulk_create(
+                Job(client=client, title=f'Job {i}', description='Bench', location='Meru',
+                    is_active=True, expires_at=expires_at)
+                for i in range(options['jobs'])
+            )]
+            view = JobRetrieveUpdateDeleteView.as_view()
+            factory = APIRequestFactory()
+
+            def get(pk):
+                request = factory.get(f'/api/jobs/{pk}/')
+                force_authenticate(request, user=fundi)
+                return view(request, pk=pk)
+
+            def direct(self, key, n=1):
+                with connection.cursor() as cursor:
+                    cursor.execute(self.sql, [timezone.localdate(), n, [key]])
+
+            modes = {
+                'no counting': mock.patch.object(Counter, 'increment', lambda self, key, n=1: None),
+                'buffered': mock.patch.object(Counter, 'increment', Counter.increment),
+                'write per view': mock.patch.object(Counter, 'increment', direct),
+            }
+            # Alternate the modes in rounds so drift hits them all alike.
+            timings = {mode: [] for mode in modes}
+            rounds = 5
+            for _ in range(rounds):
+                for mode, patch in modes.items():
+                    with patch:
+                        for _ in range(options['requests'] // rounds):
+                            pk = random.choice(job_ids)
+                            started = time.perf_counter()
+                            get(pk)
+                            timings[mode].append(time.perf_counter() - started)
+
+            for mode, samples in timings.items():
+                samples.sort()
+                self.stdout.write(
+                    f"{mode:<15} p50 {statistics.median(samples) * 1e6:7.0f} us  "
+                    f"p95 {samples[int(len(samples) * 0.95)] * 1e6:7.0f} us"
+                )
+
+            started = time.perf_counter()
+            written = flush_counters()
+            self.stdout.write(f"flush: {written} buffered views in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+            per_thread = 100000
+            threads = [
+                threading.Thread(target=lambda: [JOB_VIEWS.increment(pk) for pk in random.choices(job_ids, k=per_thread)])
+                for _ in range(options['threads'])
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"increment(): {elapsed / (per_thread * len(threads)) * 1e9:.0f} ns/call "
+                f"over {len(threads)} threads"
+            )
+            started = time.perf_counter()
+            written = flush_counters()
+            self.stdout.write(self.style.SUCCESS(
+                f"flush: {written} buffered views of {len(job_ids)} jobs in "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms"
+            ))
+            transaction.set_rollback(True)
@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from accounts.search import trigram_available
+from jobs.models import Job
+from jobs.search import search_jobs
+from jobs.views import JobSearchPagination
+
+TRADES = ['Plumbing', 'Tiling', 'Welding', 'Painting', 'Masonry', 'Roofing', 'Carpentry', 'Electrical', 'Fundi wa mabomba']
+OBJECTS = ['bathroom', 'kitchen', 'gate', 'perimeter wall', 'roof', 'office', 'shop front', 'water tank', 'nyumba']
+TOWNS = ['Meru', 'Nairobi', 'Nakuru', 'Embu', 'Thika', 'Kisumu', 'Mombasa', 'Nanyuki', 'Maua', 'Chuka']
+QUERIES = [
+    ('plumbing', None),
+    ('tiling bathroom', None),
+    ('welding gate', 'Meru'),
+    ('mabomba', 'Nanyuki'),
+    ('plumbr', None),
+]
+
+
+class Command(BaseCommand):
+    help = "Time ranked job search over N generated jobs (inserted in a transaction that is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.monotonic()
+            self.populate(options['rows'])
+            self.stdout.write(f"Inserted {options['rows']} jobs in {time.monotonic() - started:.1f}s "
+                              f"(pg_trgm {'on' if trigram_available() else 'off'})")
+
+            for query, location in QUERIES:
+                first, second, found = self.time_pages(query, location, options['page_size'], options['repeat'])
+                label = f"q={query!r}" + (f" location={location!r}" if location else "")
+                self.stdout.write(f"{label:<40} page 1 {first * 1000:7.1f} ms  page 2 {second * 1000:7.1f} ms  "
+                                  f"({found} on page 1)")
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        client = User.objects.create_user(phone_number='0799999998', name='Bench Client', id_number='0', role='client')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO jobs_job (client_id, title, description, location, created_at, is_active, is_filled, geohash)
+                SELECT %(client)s,
+                       (%(trades)s)[1 + i %% %(n_trades)s] || ' ' || (%(objects)s)[1 + (i / 7) %% %(n_objects)s],
+                       'Job ' || i || ': ' || (%(objects)s)[1 + (i / 3) %% %(n_objects)s] || ' needs '
+                           || lower((%(trades)s)[1 + (i / 11) %% %(n_trades)s]) || ' work, materials on site.',
+                       (%(towns)s)[1 + (i / 13) %% %(n_towns)s],
+                       now() - (i %% 90) * interval '1 day' - i * interval '1 second',
+                       true, false, ''
+                FROM generate_series(1, %(rows)s) AS i
+                """,
+                {
+                    'client': client.id, 'rows': rows,
+                    'trades': TRADES, 'n_trades': len(TRADES),
+                    'objects': OBJECTS, 'n_objects': len(OBJECTS),
+                    'towns': TOWNS, 'n_towns': len(TOWNS),
+                },
+            )
+            cursor.execute("ANALYZE jobs_job")
+
+    def time_pages(self, query, location, page_size, repeat):
+        paginator = JobSearchPagination()
+        jobs = Job.objects.live()
+        if location:
+            jobs = jobs.filter(location__icontains=location)
+        ranked = search_jobs(jobs, query).order_by(*paginator.ordering).values('id', 'score')
+
+        def page(queryset):
+            return list(queryset[:page_size + 1])
+
+        first = self.best_of(repeat, lambda: page(ranked))
+        rows = page(ranked)
+        if len(rows) <= page_size:
+            return first, 0.0, len(rows)
+        position = paginator.get_position(rows[page_size - 1])
+        following = ranked.filter(paginator.get_seek_filter(position))
+        second = self.best_of(repeat, lambda: page(following))
+        return first, second, min(len(rows), page_size)
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
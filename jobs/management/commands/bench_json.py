@@ -0,0 +1,85 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import FundiProfile, User
+from accounts.serializers import FundiProfileSerializer
+from ads.models import Ad
+from ads.serializers import AdSerializer
+from ajirinow import renderers
+from ajirinow.renderers import FastJSONParser, FastJSONRenderer
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+
+class Command(BaseCommand):
+    help = "Time DRF's JSONRenderer/JSONParser against the fast pair on job, ad and fundi list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; the fast pair is using stdlib json."))
+
+        for label, data in self.payloads(options['rows']).items():
+            body = JSONRenderer().render(data)
+            timings = {
+                'render': (
+                    self.best_of(options['repeat'], lambda: JSONRenderer().render(data)),
+                    self.best_of(options['repeat'], lambda: FastJSONRenderer().render(data)),
+                ),
+                'parse': (
+                    self.best_of(options['repeat'], lambda: JSONParser().parse(io.BytesIO(body))),
+                    self.best_of(options['repeat'], lambda: FastJSONParser().parse(io.BytesIO(body))),
+                ),
+            }
+            for step, (stdlib, fast) in timings.items():
+                self.stdout.write(
+                    f"{label:>6} {step:<6} {len(body) // 1024:>5} KiB  stdlib {stdlib * 1000:7.2f} ms  "
+                    f"fast {fast * 1000:7.2f} ms  x{stdlib / fast:.1f}"
+                )
+
+    def payloads(self, rows):
+        # Unsaved instances: the payloads are real serializer output without touching the database.
+        now = timezone.now()
+        image = Ad._meta.get_field('image').to_python("image/upload/v1/ads/cement.jpg")
+        client = User(id=1, name="Wanjiru Builders", phone_number="0712345678", role='client')
+        jobs = [
+            Job(id=i, client=client, title=f"Plaster a 3-bedroom house #{i}",
+                description="Need an experienced mason for plastering and skimming. " * 4,
+                location="Meru", latitude=0.0471, longitude=37.6498, is_active=True, created_at=now)
+            for i in range(rows)
+        ]
+        ads = [
+            Ad(id=i, client=client, title=f"Cement offer #{i}", description="Bamburi cement at wholesale prices. " * 3,
+               image=image, link="https://example.com", is_active=True,
+               created_at=now, expires_at=now)
+            for i in range(rows)
+        ]
+        fundis = []
+        for i in range(rows):
+            user = User(id=i, name=f"Fundi {i}", phone_number=f"07{i:08d}", id_number=str(i), role='fundi',
+                        trial_ends=now)
+            fundis.append(FundiProfile(user=user, skills="plumbing, tiling", location="Meru",
+                                       latitude=0.0471, longitude=37.6498, rate_note="1,500/day"))
+        request = APIRequestFactory().get('/api/ads/')
+        return {
+            'jobs': JobSerializer(jobs, many=True).data,
+            'ads': AdSerializer(ads, many=True, context={'request': request}).data,
+            'fundis': FundiProfileSerializer(fundis, many=True).data,
+        }
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
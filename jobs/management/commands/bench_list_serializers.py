@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from ads.models import Ad
+from ads.serializers import AdSerializer
+from ajirinow.fastpath import RowMapper
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ModelSerializer and RowMapper rendering of the job and ad lists. "
+        "Rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        context = {'request': APIRequestFactory().get('/api/ads/')}
+        cases = [
+            ('jobs', Job, JobSerializer, {}),
+            ('ads', Ad, AdSerializer, context),
+        ]
+        with transaction.atomic():
+            client = User.objects.create_user(
+                phone_number='0799999999', name='Bench Client', id_number='0', role='client'
+            )
+            created = 0
+            for rows in sorted(options['rows']):
+                self.populate(client, rows - created)
+                created = rows
+                for label, model, serializer_class, ctx in cases:
+                    queryset = model.objects.filter(client=client).order_by('-created_at')
+                    slow = self.best_of(options['repeat'], lambda: serializer_class(
+                        queryset.select_related('client'), many=True, context=ctx
+                    ).data)
+                    fast = self.best_of(options['repeat'], lambda: self.fast(queryset, serializer_class, ctx))
+                    self.stdout.write(
+                        f"{label:>5} {rows:>6} rows  serializer {slow * 1000:8.1f} ms  "
+                        f"rows {fast * 1000:8.1f} ms  x{slow / fast:.1f}"
+                    )
+            transaction.set_rollback(True)
+
+    def fast(self, queryset, serializer_class, context):
+        mapper = RowMapper(serializer_class(context=context))
+        return mapper.map_rows(queryset.values(*mapper.columns))
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def populate(self, client, count):
+        # bulk_create skips save(), so geocoding and Cloudinary uploads never run.
+        Job.objects.bulk_create(
+            Job(client=client, title=f"Job {i}", description="Build a wall " * 20,
+                location="Meru", latitude=0.05, longitude=37.65, is_active=True)
+            for i in range(count)
+        )
+        Ad.objects.bulk_create(
+            Ad(client=client, title=f"Ad {i}", description="Cement and ballast " * 10,
+               image="ads/sample", link="https://example.com", is_active=True)
+            for i in range(count)
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from ajirinow.expiry import expire_listings
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired jobs and ads and hide lapsed fundis, one UPDATE per table."
+
+    def handle(self, *args, **options):
+        for kind, (count, elapsed) in expire_listings().items():
+            self.stdout.write(f"{kind}: {count} expired in {elapsed * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS("Done"))
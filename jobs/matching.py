@@ -0,0 +1,95 @@
+"""
+Personalized job feed: an inverted index of job terms matched against a
+fundi's skills and location.
+
+Each active job has one JobTerm row per distinct term, weighted by where the
+term appears. Trade words go through accounts.skills, so "plumber" in a job
+title and "Plumbing" in a profile meet at the same term. Location words are
+stored with a `loc:` prefix so they only match the fundi's location.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from accounts.skills import ALIASES, normalize_skill, tokenize_skills
+
+from .models import Job, JobTerm
+
+WORD_RE = re.compile(r"[a-z]+")
+MIN_TERM_LENGTH = 3
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'from', 'this', 'that', 'need', 'needed', 'needs', 'looking',
+    'job', 'work', 'urgent', 'town', 'county', 'near', 'kwa', 'ya', 'wa', 'na', 'la', 'za',
+}
+PHRASES = [alias for alias in ALIASES if ' ' in alias]
+LOCATION_PREFIX = 'loc:'
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+LOCATION_WEIGHT = 2
+MAX_TERM_LENGTH = JobTerm._meta.get_field('term').max_length
+
+
+def text_terms(text):
+    """Distinct normalized terms in free text."""
+    text = (text or '').lower()
+    terms = {ALIASES[phrase] for phrase in PHRASES if phrase in text}
+    for word in WORD_RE.findall(text):
+        if len(word) >= MIN_TERM_LENGTH and word not in STOP_WORDS:
+            terms.add(normalize_skill(word))
+    return terms
+
+
+def location_terms(location):
+    return {(LOCATION_PREFIX + term)[:MAX_TERM_LENGTH] for term in text_terms(location)}
+
+
+def job_terms(title, description, location):
+    """{term: weight} for one job."""
+    weights = {}
+    for terms, weight in (
+        (text_terms(title), TITLE_WEIGHT),
+        (text_terms(description), DESCRIPTION_WEIGHT),
+        (location_terms(location), LOCATION_WEIGHT),
+    ):
+        for term in terms:
+            term = term[:MAX_TERM_LENGTH]
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def profile_terms(profile):
+    """Terms a fundi's profile matches on: skill tags, their words, and location."""
+    terms = set(tokenize_skills(profile.skills)) | text_terms(profile.skills)
+    return {term[:MAX_TERM_LENGTH] for term in terms} | location_terms(profile.location)
+
+
+def index_job(job):
+    """Replace the job's postings (one DELETE and one INSERT)."""
+    with transaction.atomic():
+        JobTerm.objects.filter(job=job).delete()
+        JobTerm.objects.bulk_create(
+            JobTerm(job=job, term=term, weight=weight)
+            for term, weight in job_terms(job.title, job.description, job.location).items()
+        )
+
+
+def match_jobs(profile, limit):
+    """
+    [{'job_id', 'score'}] for the `limit` best live jobs, best first.
+    Only jobs sharing at least one skill term are returned; location adds to the score.
+    """
+    terms = profile_terms(profile)
+    if not terms:
+        return []
+    return list(
+        JobTerm.objects.filter(term__in=terms, job__in=Job.objects.live())
+        .values('job_id')
+        .annotate(
+            score=Sum('weight'),
+            skill_score=Sum('weight', filter=~Q(term__startswith=LOCATION_PREFIX)),
+        )
+        .filter(skill_score__gt=0)
+        .order_by('-score', '-job_id')
+        .values('job_id', 'score')[:limit]
+    )
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+from ajirinow.gazetteer import geocode
+from ajirinow.geo import geohash_encode
+
+
+def geocode_existing(apps, schema_editor):
+    Job = apps.get_model("jobs", "Job")
+    updated = []
+    for row in Job.objects.only("id", "location").iterator(chunk_size=1000):
+        coords = geocode(row.location)
+        if coords:
+            row.latitude, row.longitude = coords
+            row.geohash = geohash_encode(*coords)
+            updated.append(row)
+    Job.objects.bulk_update(updated, ["latitude", "longitude", "geohash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=9
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_active_jobs(apps, schema_editor):
+    from jobs.matching import job_terms
+
+    Job = apps.get_model("jobs", "Job")
+    JobTerm = apps.get_model("jobs", "JobTerm")
+    postings = []
+    for job in Job.objects.filter(is_active=True).iterator(chunk_size=1000):
+        for term, weight in job_terms(job.title, job.description, job.location).items():
+            postings.append(JobTerm(job_id=job.id, term=term, weight=weight))
+    JobTerm.objects.bulk_create(postings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0004_active_expires_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=50)),
+                ("weight", models.PositiveSmallIntegerField()),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("term", "job"), name="job_term_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(index_active_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0008_daily_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="inboxitem",
+            name="inbox_item_fundi_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="inboxitem",
+            index=models.Index(fields=["fundi", "id"], name="inbox_item_fundi_id_idx"),
+        ),
+    ]
@@ -1,10 +1,17 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User
 from payments.models import Payment
+from ajirinow.expiry import ExpiringQuerySet
+from ajirinow.geo import GeoLocatedModel
 
-class Job(models.Model):
+# Job fields the feed postings depend on (see index_job_terms).
+INDEXED_FIELDS = {'title', 'description', 'location', 'is_active'}
+
+class Job(GeoLocatedModel):
     client = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -14,19 +21,135 @@ class Job(models.Model):
     is_active = models.BooleanField(default=False)  # initially inactive
     is_filled = models.BooleanField(default=False)
     payment = models.ForeignKey(Payment, null=True, blank=True, on_delete=models.SET_NULL)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = ExpiringQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            # Serves the active job feed (newest first, keyset-paginated).
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='job_active_feed_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['expires_at'],
+                name='job_active_expires_idx',
+                condition=models.Q(is_active=True),
+            ),
+            GinIndex(fields=['search_vector'], name='job_search_vector_idx'),
+        ]
 
     def activate(self):
         self.is_active = True
         self.expires_at = timezone.now() + timedelta(weeks=12)
         self.save()
+        # Matching fundis are notified by the background worker, not here.
+        from .notifications import enqueue_notification
+        enqueue_notification(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred (.only()) loads leave the indexed state unknown.
+        if INDEXED_FIELDS <= instance.__dict__.keys():
+            instance._indexed_state = instance.indexed_state()
+        return instance
+
+    def indexed_state(self):
+        """The values the job's feed postings are built from (see jobs.matching)."""
+        return tuple(getattr(self, name) for name in sorted(INDEXED_FIELDS))
 
     def save(self, *args, **kwargs):
         # Auto-deactivate if job is filled or expired
         if self.is_filled or (self.expires_at and self.expires_at < timezone.now()):
             self.is_active = False
+        self.update_geo()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} - {self.client.name}"
 
+
+
+class JobTerm(models.Model):
+    """One posting in the inverted index behind the fundi job feed (see jobs.matching)."""
+    term = models.CharField(max_length=50)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='terms')
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the term -> jobs lookup index.
+            models.UniqueConstraint(fields=['term', 'job'], name='job_term_unique'),
+        ]
+
+
+class JobDailyStats(models.Model):
+    """Views of one job by fundis on one day (written by ajirinow.counters)."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    view_count = models.PositiveIntegerField(db_default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'day'], name='job_daily_stats_unique'),
+        ]
+
+
+class JobNotification(models.Model):
+    """A queued fan-out of one activated job to matching fundis' inboxes (see jobs.notifications)."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='notifications')
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='job_notification_pending_idx', condition=models.Q(processed_at=None)),
+        ]
+
+
+class InboxItem(models.Model):
+    """A new job delivered to one fundi, with its match score."""
+    fundi = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_inbox')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='inbox_items')
+    score = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fundi', 'job'], name='inbox_item_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['fundi', 'id'], name='inbox_item_fundi_id_idx'),
+        ]
+
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Job)
+def index_job_terms(sender, instance, created, update_fields=None, **kwargs):
+    # Jobs are indexed once they go live (activation after payment) and
+    # re-indexed when their text changes; pending jobs are skipped, and so
+    # are saves that leave the indexed values as they were loaded.
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    state = instance.indexed_state()
+    unchanged = state == getattr(instance, '_indexed_state', None)
+    instance._indexed_state = state
+    if not instance.is_active or unchanged:
+        return
+    from .matching import index_job
+    index_job(instance)
@@ -0,0 +1,133 @@
+"""
+New-job notifications: when a job goes live, matching fundis get an inbox row.
+
+`Job.activate()` only queues a JobNotification row, inside the caller's
+transaction, so the M-Pesa callback never waits on matching. Once that
+transaction commits, a worker thread in the same process (see
+ajirinow.worker) is woken to run the fan-out: it claims queued rows with
+SELECT ... FOR UPDATE SKIP LOCKED (so several processes can share the
+queue), matches the job against fundis' skill tags and location, scores each
+candidate the way the for-me feed does and writes InboxItem rows in batches.
+Failed fan-outs are retried up to MAX_ATTEMPTS.
+
+Location narrows the recipients rather than only adding to the score: a
+geocoded job reaches fundis within JOB_NOTIFY_RADIUS_KM, and fundis (or
+jobs) without coordinates need a location word in common, e.g. the same
+village name. A job with neither coordinates nor location words goes to
+every fundi with the skill.
+
+Set JOB_NOTIFY_WORKER=0 to keep the worker out of web processes and drain
+the queue with `manage.py notify_jobs --loop` instead.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounts.models import FundiProfile
+from ajirinow.geo import filter_near
+from ajirinow.worker import QueueWorker
+
+from .matching import LOCATION_PREFIX, job_terms, profile_terms
+from .models import InboxItem, JobNotification
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# pg_advisory_xact_lock key serializing fan-outs across processes.
+FAN_OUT_LOCK = 0x6a6f6273
+MAX_ATTEMPTS = 5
+
+
+def enqueue_notification(job):
+    """Queue the fan-out for `job` and wake the worker once the transaction commits."""
+    JobNotification.objects.create(job=job)
+    if settings.JOB_NOTIFY_WORKER:
+        transaction.on_commit(wake_worker)
+
+
+def fan_out(job):
+    """
+    Write an inbox row for every visible, available fundi the job matches by
+    skill and location (see above). Returns the count. Must run inside a
+    transaction: fan-outs are serialized on an advisory lock held until
+    commit, so inbox ids become visible in order and the inbox's `after`
+    cursor never passes over a late commit.
+    """
+    if not job.is_active:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [FAN_OUT_LOCK])
+    weights = job_terms(job.title, job.description, job.location)
+    skill_terms = [term for term in weights if not term.startswith(LOCATION_PREFIX)]
+    if not skill_terms:
+        return 0
+
+    place_terms = {term for term in weights if term.startswith(LOCATION_PREFIX)}
+
+    candidates = (
+        FundiProfile.objects.visible()
+        .filter(is_available=True, skill_tags__name__in=skill_terms)
+        .distinct()
+        .only('user_id', 'skills', 'location', 'geohash')
+    )
+    if job.geohash:
+        nearby = filter_near(FundiProfile.objects.all(), job.latitude, job.longitude,
+                             settings.JOB_NOTIFY_RADIUS_KM).values('pk')
+        # Fundis without coordinates are matched on location words below.
+        candidates = candidates.filter(Q(pk__in=nearby) | Q(geohash=''))
+
+    created, batch = 0, []
+    for profile in candidates.iterator(chunk_size=BATCH_SIZE):
+        terms = profile_terms(profile)
+        if place_terms and not (job.geohash and profile.geohash) and not place_terms & terms:
+            continue
+        score = sum(weights[term] for term in terms if term in weights)
+        batch.append(InboxItem(fundi_id=profile.user_id, job=job, score=score))
+        if len(batch) == BATCH_SIZE:
+            created += len(InboxItem.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        created += len(InboxItem.objects.bulk_create(batch, ignore_conflicts=True))
+    return created
+
+
+def process_next():
+    """Claim and run one queued notification. Returns False when the queue is empty."""
+    with transaction.atomic():
+        notification = (
+            JobNotification.objects.select_for_update(skip_locked=True)
+            .select_related('job')
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')
+            .first()
+        )
+        if notification is None:
+            return False
+        try:
+            with transaction.atomic():
+                fan_out(notification.job)
+        except Exception as exc:
+            logger.exception("Notifying fundis of job %s failed", notification.job_id)
+            JobNotification.objects.filter(pk=notification.pk).update(
+                attempts=F('attempts') + 1, last_error=str(exc)
+            )
+        else:
+            JobNotification.objects.filter(pk=notification.pk).update(
+                attempts=F('attempts') + 1, processed_at=timezone.now()
+            )
+    return True
+
+
+def process_pending(limit=None):
+    """Run queued notifications until the queue is empty (or `limit` have run). Returns the count."""
+    count = 0
+    while (limit is None or count < limit) and process_next():
+        count += 1
+    return count
+
+
+worker = QueueWorker('job-notify-worker', process_pending, 'JOB_NOTIFY_POLL_INTERVAL')
+wake_worker = worker.wake
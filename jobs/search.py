@@ -0,0 +1,33 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Extract, Greatest, Ln
+
+from accounts.search import SEARCH_CONFIG, trigram_available
+
+# A job this many seconds newer scores as if its text matched e (~2.7) times
+# better. Recency is measured from a fixed epoch rather than from now(), so a
+# job's score never changes and keyset cursors over it stay valid.
+RECENCY_SECONDS = 7 * 24 * 3600
+# Trigram similarity (0..1) is scaled down so exact full-text hits stay ahead.
+TRIGRAM_WEIGHT = 0.5
+MIN_RELEVANCE = 1e-6
+
+
+def search_jobs(jobs, query):
+    """
+    Filter `jobs` to those matching `query` and annotate a `score`.
+
+    Matches come from the weighted search_vector (title over description);
+    with pg_trgm installed, titles with a similar word ("plumbr", "fundi wa
+    mabomba") match too.
+    """
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    match = Q(search_vector=search_query)
+    relevance = SearchRank(F('search_vector'), search_query)
+    if trigram_available():
+        match |= Q(title__trigram_word_similar=query)
+        relevance = Greatest(relevance, TrigramWordSimilarity(query, 'title') * TRIGRAM_WEIGHT)
+
+    age = Cast(Extract('created_at', 'epoch'), FloatField())
+    score = Ln(Greatest(relevance, Value(MIN_RELEVANCE), output_field=FloatField())) + age / RECENCY_SECONDS
+    return jobs.filter(match).annotate(score=score)
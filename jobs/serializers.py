@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from .models import Job
 from accounts.serializers import ClientMiniSerializer  # ✅ Nested client serializer
+from ajirinow.geo import GeoLocatedSerializerMixin
+from ajirinow.sparse import SparseFieldsetMixin
+from payments.serializers import PaymentStatusSerializer
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsetMixin, GeoLocatedSerializerMixin, serializers.ModelSerializer):
     client = ClientMiniSerializer(read_only=True)  # ✅ Includes name & phone_number
 
     class Meta:
@@ -13,8 +16,17 @@ class JobSerializer(serializers.ModelSerializer):
             'title',
             'description',
             'location',
+            'latitude',
+            'longitude',
             'is_active',
             'created_at',
         ]
         read_only_fields = ['id', 'client', 'created_at']
 
+
+class MyJobSerializer(JobSerializer):
+    """A job as its owner sees it, with the payment that activates it (null until paid)."""
+    payment = PaymentStatusSerializer(read_only=True)
+
+    class Meta(JobSerializer.Meta):
+        fields = JobSerializer.Meta.fields + ['payment']
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
@@ -67,5 +67,359 @@ class JobsTestCase(TestCase):
 
         response = self.client.get("/api/jobs/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_job_feed_is_closed_once_the_trial_lapses(self):
+        fundi = User.objects.create_user(
+            phone_number="0712000111", name="Fundi", id_number="120001", password="testpass123", role="fundi"
+        )
+        self.client.force_authenticate(user=fundi)
+        self.assertEqual(self.client.get("/api/jobs/").status_code, status.HTTP_200_OK)
+
+        # The trial ends without any save; is_visible stays set until the sweep.
+        User.objects.filter(pk=fundi.pk).update(trial_ends=timezone.now() - timedelta(minutes=1))
+        fundi.refresh_from_db()
+        self.assertTrue(fundi.is_visible)
+        self.assertEqual(self.client.get("/api/jobs/").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get("/api/jobs/for-me/").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_job_list_near_filters_and_sorts_by_distance(self):
+        for title, location in [("Thika job", "Thika"), ("Kisumu job", "Kisumu"), ("Ruiru job", "Ruiru")]:
+            Job.objects.create(
+                client=self.user,
+                title=title,
+                description="Fix something",
+                location=location,
+                is_active=True
+            )
+
+        response = self.client.get("/api/jobs/", {"near": "-1.1466,36.9609", "radius_km": 30})
+        self.assertEqual([job["title"] for job in response.data["results"]], ["Ruiru job", "Thika job"])
+        self.assertIsNone(response.data["next"])
+
+        # Radius results are paged too, nearest first.
+        response = self.client.get("/api/jobs/", {"near": "-1.1466,36.9609", "radius_km": 200, "page_size": 1})
+        titles = []
+        while True:
+            titles += [job["title"] for job in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(titles, ["Ruiru job", "Thika job"])
+
+    def test_job_list_sparse_fields(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(2):
+            Job.objects.create(
+                client=self.user,
+                title=f"Job {i}",
+                description="A long description nobody asked for",
+                location="Meru",
+                is_active=True
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/jobs/", {"fields": "id,title"})
+        self.assertEqual([set(job) for job in response.data["results"]], [{"id", "title"}] * 2)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+        self.assertNotIn("accounts_user", queries[0]["sql"])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/jobs/", {"exclude": "description"})
+        self.assertNotIn("description", response.data["results"][0])
+        self.assertEqual(response.data["results"][0]["client"], {"name": "Client", "phone_number": "0712345678"})
+        self.assertEqual(len(queries), 1)
+
+    def test_my_jobs_embed_payment_status_in_one_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        payment = Payment.objects.create(user=self.user, phone="254700000000", amount=100,
+                                         status="Completed", purpose="post_job")
+        Job.objects.create(client=self.user, title="Paid", description="d", location="Meru", payment=payment)
+        Job.objects.create(client=self.user, title="Unpaid", description="d", location="Meru")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/jobs/mine/")
+        self.assertEqual(len(queries), 1)
+        payments = {job["title"]: job["payment"] for job in response.data}
+        self.assertEqual(payments["Unpaid"], None)
+        self.assertEqual(payments["Paid"]["status"], "Completed")
+        self.assertEqual(payments["Paid"]["post_expiry_date"], str(payment.post_expiry_date))
+
+    def test_job_list_fast_path_matches_serializer(self):
+        from rest_framework.renderers import JSONRenderer
+        from jobs.serializers import JobSerializer, MyJobSerializer
+
+        payment = Payment.objects.create(user=self.user, amount=100, purpose="post_job", status="Completed")
+        for i, location in enumerate(["Meru", "Atlantis"]):
+            Job.objects.create(
+                client=self.user,
+                title=f"Job {i}",
+                description="Fix something",
+                location=location,
+                is_active=True,
+                payment=payment if i else None,
+            )
+        jobs = Job.objects.filter(is_active=True).order_by('-created_at')
+
+        response = self.client.get("/api/jobs/")
+        expected = {"next": None, "results": JobSerializer(jobs, many=True).data}
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+        response = self.client.get("/api/jobs/mine/")
+        self.assertEqual(response.content, JSONRenderer().render(MyJobSerializer(jobs, many=True).data))
+
+        response = self.client.get("/api/jobs/", {"fields": "id,client,created_at"})
+        expected = [{"id": job.id, "client": {"name": "Client", "phone_number": "0712345678"},
+                     "created_at": JobSerializer().fields["created_at"].to_representation(job.created_at)}
+                    for job in jobs]
+        self.assertEqual(response.json()["results"], expected)
+
+    def test_job_feed_keyset_pages_cost_two_queries(self):
+        from rest_framework.authtoken.models import Token
+        from accounts.authentication import local_cache
+
+        Job.objects.bulk_create(
+            Job(client=self.user, title=f"Job {i}", description="Fix something", location="Meru", is_active=True)
+            for i in range(12)
+        )
+        # Ties on created_at are broken by id.
+        Job.objects.filter(title__in=["Job 4", "Job 5", "Job 6"]).update(created_at=timezone.now())
+        expected = list(Job.objects.order_by("-created_at", "-id").values_list("title", flat=True))
+
+        token = Token.objects.create(user=self.user)
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        # The feed is always paged; without page_size a page holds 20.
+        for url in ("/api/jobs/", "/api/jobs/?page_size=5", "/api/jobs/?page_size=50"):
+            titles = []
+            while url:
+                local_cache.clear()
+                # Token lookup + one page query, however big the page.
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                titles += [job["title"] for job in response.data["results"]]
+                url = response.data["next"]
+            self.assertEqual(titles, expected)
+
+    def test_tampered_cursors_are_rejected(self):
+        import base64
+        import json
+
+        Job.objects.create(client=self.user, title="Leaking tap", description="Fix it", location="Meru", is_active=True)
+
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+        for path, params in (
+            ("/api/jobs/", {"cursor": cursor(["x", "y"])}),
+            ("/api/jobs/", {"cursor": cursor([None, 1])}),
+            ("/api/jobs/", {"cursor": cursor([[1], {"a": 1}])}),
+            ("/api/jobs/", {"q": "tap", "cursor": cursor(["zz", 1])}),
+            ("/api/accounts/fundis/", {"cursor": cursor(["abc"])}),
+            ("/api/accounts/fundis/", {"cursor": "not base64!"}),
+        ):
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, (path, params))
+            self.assertEqual(str(response.data["detail"]), "Invalid cursor")
+
+        response = self.client.get("/api/jobs/", {"q": "tap", "cursor": cursor([1.5, 10**9])})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_jobs_for_me_ranks_by_skills_and_location(self):
+        fundi = User.objects.create_user(
+            phone_number="0722000000",
+            name="Fundi",
+            id_number="22000000",
+            password="testpass123",
+            role="fundi"
+        )
+        fundi.fundi_profile.skills = "Plumber, tiling"
+        fundi.fundi_profile.location = "Meru"
+        fundi.fundi_profile.save()
+
+        for title, description, location, active in [
+            ("Plumber wanted", "Kitchen sink leaks", "Meru", True),
+            ("Bathroom tiling", "Floor and walls", "Nairobi", True),
+            ("Fix pipes", "Plumbing for a new house", "Nairobi", True),
+            ("House painting", "Two rooms", "Meru", True),
+            ("Plumber for hotel", "Pending payment", "Meru", False),
+        ]:
+            Job.objects.create(client=self.user, title=title, description=description,
+                               location=location, is_active=active)
+        # Edits re-index the job.
+        job = Job.objects.get(title="Bathroom tiling")
+        job.location = "Meru"
+        job.save()
+
+        self.client.force_authenticate(user=fundi)
+        response = self.client.get("/api/jobs/for-me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(job["title"], job["score"]) for job in response.data],
+            # Ties go to the newer job.
+            [("Bathroom tiling", 5), ("Plumber wanted", 5), ("Fix pipes", 1)],
+        )
+        self.assertEqual(response.data[0]["client"]["name"], "Client")
+
+        response = self.client.get("/api/jobs/for-me/", {"limit": 1})
         self.assertEqual(len(response.data), 1)
 
+        # Saves that don't touch the indexed text leave the postings alone.
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        job = Job.objects.get(title="Plumber wanted")
+        with CaptureQueriesContext(connection) as queries:
+            job.activate()
+            job.is_filled = False
+            job.save()
+        self.assertFalse([q for q in queries if "jobs_jobterm" in q["sql"]])
+
+        fundi.fundi_profile.delete()
+        fundi = User.objects.get(pk=fundi.pk)
+        self.client.force_authenticate(user=fundi)
+        response = self.client.get("/api/jobs/for-me/")
+        self.assertEqual((response.status_code, response.data), (status.HTTP_200_OK, []))
+
+    def test_job_search_ranks_title_and_recency_and_paginates(self):
+        for title, description, location in [
+            ("Plumbing repairs", "Leaking kitchen sink", "Meru"),
+            ("Kitchen renovation", "Includes plumbing and tiling", "Meru"),
+            ("House painting", "Three rooms", "Meru"),
+            ("Plumbing for a hotel", "Large job", "Nairobi"),
+        ]:
+            Job.objects.create(client=self.user, title=title, description=description,
+                               location=location, is_active=True)
+        Job.objects.filter(title="Plumbing for a hotel").update(created_at=timezone.now() - timedelta(days=30))
+
+        response = self.client.get("/api/jobs/", {"q": "plumbing"})
+        self.assertEqual(
+            [job["title"] for job in response.data["results"]],
+            ["Plumbing repairs", "Kitchen renovation", "Plumbing for a hotel"],
+        )
+
+        response = self.client.get("/api/jobs/", {"q": "plumbing", "location": "meru"})
+        self.assertEqual([job["title"] for job in response.data["results"]], ["Plumbing repairs", "Kitchen renovation"])
+
+        response = self.client.get("/api/jobs/", {"q": "plumbing", "page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(response.data["next"])
+        self.assertEqual([job["title"] for job in response.data["results"]], ["Plumbing for a hotel"])
+        self.assertIsNone(response.data["next"])
+
+    def test_activated_job_is_delivered_to_matching_fundi_inboxes(self):
+        from jobs.models import InboxItem, JobNotification
+        from jobs.notifications import process_pending
+
+        fundis = {}
+        for phone, skills, location in [("0722000001", "Plumber", "Meru"), ("0722000002", "Painting", "Meru"),
+                                        ("0722000004", "Plumbing", "Mombasa"),
+                                        ("0722000005", "Plumber", "Kanyakine market")]:
+            fundi = User.objects.create_user(phone_number=phone, name=f"{skills} {location}"[:50],
+                                             id_number=phone, password="testpass123", role="fundi")
+            fundi.fundi_profile.skills = skills
+            fundi.fundi_profile.location = location
+            fundi.fundi_profile.save()
+            fundis[skills] = fundis.get(skills, fundi)
+
+        job = Job.objects.create(client=self.user, title="Plumber wanted", description="Kitchen sink leaks",
+                                 location="Meru", is_active=False)
+        with self.captureOnCommitCallbacks() as callbacks:
+            job.activate()
+        # Activation only queues the fan-out; the worker is woken after commit.
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(InboxItem.objects.exists())
+
+        self.assertEqual(process_pending(), 1)
+        self.assertIsNotNone(JobNotification.objects.get(job=job).processed_at)
+        # Location narrows the recipients: the Mombasa plumber is out of range
+        # and the one in an un-geocoded village shares no place name.
+        self.assertEqual(list(InboxItem.objects.values_list("fundi__name", "score")), [("Plumber Meru", 5)])
+
+        village = Job.objects.create(client=self.user, title="Plumber needed", description="Tank",
+                                     location="Kanyakine", is_active=False)
+        village.activate()
+        process_pending()
+        self.assertEqual(list(InboxItem.objects.filter(job=village).values_list("fundi__name", flat=True)),
+                         ["Plumber Kanyakine market"])
+        InboxItem.objects.filter(job=village).delete()
+
+        self.client.force_authenticate(user=fundis["Plumber"])
+        response = self.client.get("/api/jobs/inbox/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["job"]["title"] for item in response.data["results"]], ["Plumber wanted"])
+
+        after = response.data["after"]
+        self.assertEqual(after, InboxItem.objects.get().id)
+        response = self.client.get("/api/jobs/inbox/", {"after": after})
+        self.assertEqual((response.data["after"], response.data["results"]), (after, []))
+
+        # Items sharing a timestamp aren't lost at a page boundary.
+        later = [Job.objects.create(client=self.user, title=f"Plumber {i}", description="d", location="Meru",
+                                    is_active=True) for i in range(3)]
+        InboxItem.objects.bulk_create(InboxItem(fundi=fundis["Plumber"], job=job, score=1) for job in later)
+        InboxItem.objects.filter(job__in=later).update(created_at=timezone.now())
+        titles = []
+        for _ in range(3):
+            response = self.client.get("/api/jobs/inbox/", {"after": after, "limit": 2})
+            titles += [item["job"]["title"] for item in response.data["results"]]
+            after = response.data["after"]
+        self.assertEqual(titles, ["Plumber 0", "Plumber 1", "Plumber 2"])
+
+        # A lapsed fundi can't read the inbox either.
+        User.objects.filter(pk=fundis["Plumber"].pk).update(trial_ends=timezone.now() - timedelta(minutes=1))
+        self.client.force_authenticate(user=User.objects.get(pk=fundis["Plumber"].pk))
+        response = self.client.get("/api/jobs/inbox/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(str(response.data["detail"]), "Subscription required to view jobs.")
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get("/api/jobs/inbox/").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_queue_worker_drains_leftovers_on_start(self):
+        import threading
+        from ajirinow.worker import QueueWorker
+
+        drained = threading.Event()
+        worker = QueueWorker("test-worker", drained.set, "JOB_NOTIFY_POLL_INTERVAL")
+        # Nothing is enqueued; starting the worker alone drains the queue.
+        worker.start()
+        self.assertTrue(drained.wait(5))
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_job_views_by_fundis_are_counted_for_the_owner(self):
+        from ajirinow.counters import flush_counters
+
+        job = Job.objects.create(client=self.user, title="Roof repair", description="Leaking roof",
+                                 location="Meru", is_active=True)
+        fundi = User.objects.create_user(phone_number="0722000003", name="Fundi", id_number="22000003",
+                                         password="testpass123", role="fundi")
+        flush_counters()
+
+        self.client.get(f"/api/jobs/{job.id}/")  # the owner's own view
+        self.client.force_authenticate(user=fundi)
+        self.client.get(f"/api/jobs/{job.id}/")
+        self.client.get(f"/api/jobs/{job.id}/")
+        self.assertEqual(flush_counters(), 2)
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/stats/").status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f"/api/jobs/{job.id}/stats/")
+        self.assertEqual(response.data["view_count"], 2)
+        self.assertEqual(response.data["daily"], [{"day": timezone.localdate(), "view_count": 2}])
+
+        # A full buffer (say, while the database is down) drops and logs new entries.
+        from unittest import mock
+        from jobs.views import JOB_VIEWS
+        with mock.patch("ajirinow.counters.MAX_BUFFERED", 1):
+            JOB_VIEWS.increment(job.id)
+            JOB_VIEWS.increment(job.id)
+            JOB_VIEWS.increment(job.id + 1)
+            with self.assertLogs("ajirinow.counters", "WARNING") as logs:
+                self.assertEqual(flush_counters(), 2)
+        self.assertIn("dropped 1 increments", logs.output[0])
@@ -1,9 +1,13 @@
 from django.urls import path
-from .views import JobListCreateView, MyJobListView, JobRetrieveUpdateDeleteView
+from .views import JobListCreateView, MyJobListView, JobRetrieveUpdateDeleteView, JobExportView, JobsForMeView, JobInboxView, JobStatsView
 
 urlpatterns = [
     path('', JobListCreateView.as_view(), name='job-list-create'),
     path('mine/', MyJobListView.as_view(), name='my-jobs'),
+    path('export/', JobExportView.as_view(), name='job-export'),
+    path('for-me/', JobsForMeView.as_view(), name='jobs-for-me'),
+    path('inbox/', JobInboxView.as_view(), name='job-inbox'),
     path('<int:pk>/', JobRetrieveUpdateDeleteView.as_view(), name='job-detail'),
+    path('<int:pk>/stats/', JobStatsView.as_view(), name='job-stats'),
 ]
 
@@ -1,51 +1,202 @@
 from datetime import timedelta
+from django.db.models import Max
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import Job
-from .serializers import JobSerializer
+from ajirinow.counters import Counter, counter_totals
+from ajirinow.exports import ExportView, parse_bound
+from ajirinow.geo import filter_near, parse_near
+from ajirinow.pagination import KeysetPagination
+from ajirinow.fastpath import FastListMixin, RowMapper
+from ajirinow.sparse import SparseQuerysetMixin
+from .models import InboxItem, Job, JobDailyStats
+from .matching import match_jobs
+from .search import search_jobs
+from .serializers import JobSerializer, MyJobSerializer
 
 
-class JobListCreateView(generics.ListCreateAPIView):
+class JobFeedPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+    opt_in = False
+
+
+class JobSearchPagination(KeysetPagination):
+    ordering = ('-score', '-id')
+    opt_in = False
+
+
+class JobNearPagination(KeysetPagination):
+    ordering = ('distance_km', 'id')
+    opt_in = False
+
+
+class JobListCreateView(FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET:
     - Fundis (with active subscription or trial): View all active jobs.
     - Clients/Advertisers: View all active jobs.
+    - `q`: full-text search over title (weighted) and description, best and newest matches first.
+    - `location`: only jobs whose location contains this text.
+    - `near=lat,lon` (optional `radius_km`, default 10): only jobs within the radius, nearest first.
+    - Results come a page at a time (`page_size`, default 20, max 100); follow `next` for more.
+    - `fields=a,b` / `exclude=c`: return only some fields.
 
     POST:
     - Clients/Advertisers: Create a job. Job will be inactive until payment is made.
     """
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = JobFeedPagination
 
     def get_queryset(self):
         user = self.request.user
 
-        if user.role in ['client', 'advertiser']:
-            return Job.objects.filter(is_active=True).order_by('-created_at')
-
         if user.role == 'fundi':
-            if not user.is_on_trial and not user.is_subscribed:
+            if not (user.is_on_trial or user.is_subscribed):
                 raise PermissionDenied("Subscription required to view jobs.")
-            return Job.objects.filter(is_active=True).order_by('-created_at')
+        elif user.role not in ['client', 'advertiser']:
+            return Job.objects.none()
+
+        params = self.request.query_params
+        jobs = Job.objects.live().select_related('client').order_by('-created_at')
+        location = params.get('location', '').strip()
+        if location:
+            jobs = jobs.filter(location__icontains=location)
+        query = params.get('q', '').strip()
+        if query:
+            jobs = search_jobs(jobs, query).order_by('-score', '-id')
+        near = parse_near(params)
+        if near:
+            jobs = filter_near(jobs, *near)
+        return self.narrow_queryset(jobs)
 
-        return Job.objects.none()
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if parse_near(params):
+                self._paginator = JobNearPagination()
+            elif params.get('q', '').strip():
+                self._paginator = JobSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def perform_create(self, serializer):
         serializer.save(client=self.request.user)
 
 
-class MyJobListView(generics.ListAPIView):
+class MyJobListView(FastListMixin, SparseQuerysetMixin, generics.ListAPIView):
     """
     GET:
-    - List jobs posted by the logged-in user (client or advertiser).
+    - List jobs posted by the logged-in user (client or advertiser), each with
+      its `payment` status, purpose and post_expiry_date (null until paid).
+    - `fields=a,b` / `exclude=c`: return only some fields.
     """
-    serializer_class = JobSerializer
+    serializer_class = MyJobSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Job.objects.filter(client=self.request.user).order_by('-created_at')
+        jobs = (
+            Job.objects.filter(client=self.request.user)
+            .select_related('client', 'payment')
+            .order_by('-created_at')
+        )
+        return self.narrow_queryset(jobs)
+
+
+class JobsForMeView(APIView):
+    """
+    GET (fundis with an active trial or subscription): Active jobs matching the
+    fundi's skills, with location matches ranked higher, each with a `score`.
+    Optional `limit` (default 20, max 50).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        user = request.user
+        if user.role != 'fundi':
+            return Response({"error": "Not authorized"}, status=403)
+        if not (user.is_on_trial or user.is_subscribed):
+            raise PermissionDenied("Subscription required to view jobs.")
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), self.max_limit))
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+
+        if not hasattr(user, 'fundi_profile'):
+            return Response([])
+        scores = {match['job_id']: match['score'] for match in match_jobs(user.fundi_profile, limit)}
+        mapper = RowMapper(JobSerializer(context={'request': request}))
+        rows = {row['id']: row for row in Job.objects.filter(id__in=scores).values(*mapper.columns)}
+        return Response([
+            {**mapper.map_row(rows[job_id]), "score": score}
+            for job_id, score in scores.items() if job_id in rows
+        ])
+
+
+class JobInboxView(APIView):
+    """
+    GET (fundis with an active trial or subscription): Jobs delivered to the
+    fundi's inbox, oldest first, at most `limit` (default 50, max 100). The
+    first poll returns items since `since` (ISO datetime; default the last
+    7 days); poll again with the returned `after` to get only items
+    delivered after those.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 100
+    window = timedelta(days=7)
+    columns = ('id', 'job_id', 'job__title', 'job__location', 'score', 'created_at')
+
+    def get(self, request):
+        user = request.user
+        if user.role != 'fundi':
+            return Response({"error": "Not authorized"}, status=403)
+        if not (user.is_on_trial or user.is_subscribed):
+            raise PermissionDenied("Subscription required to view jobs.")
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 50)), self.max_limit))
+            after = request.query_params.get("after")
+            after = int(after) if after else None
+        except ValueError:
+            return Response({"error": "limit and after must be numbers"}, status=400)
+
+        # Inbox rows are committed in id order (see jobs.notifications.fan_out),
+        # so an id cursor never skips a row that commits late.
+        items = InboxItem.objects.filter(fundi=user, job__is_active=True)
+        if after is not None:
+            items = items.filter(id__gt=after)
+        else:
+            since = parse_bound(request.query_params.get("since"), "since") or timezone.now() - self.window
+            items = items.filter(created_at__gt=since)
+        items = list(items.order_by('id').values(*self.columns)[:limit])
+        if items:
+            after = items[-1]['id']
+        elif after is None:
+            # Nothing new yet: start the next poll after everything delivered so far.
+            after = InboxItem.objects.filter(fundi=user).aggregate(last=Max('id'))['last'] or 0
+        return Response({
+            "after": after,
+            "results": [
+                {
+                    "id": item['id'],
+                    "job": {"id": item['job_id'], "title": item['job__title'], "location": item['job__location']},
+                    "score": item['score'],
+                    "created_at": item['created_at'],
+                }
+                for item in items
+            ],
+        })
+
+
+JOB_VIEWS = Counter(JobDailyStats, 'view_count', target='job')
 
 
 class JobRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
@@ -63,6 +214,44 @@ class JobRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if request.user.role == 'fundi':
+            JOB_VIEWS.increment(response.data['id'])
+        return response
+
     def perform_update(self, serializer):
         serializer.save(client=self.request.user)
 
+
+class JobStatsView(APIView):
+    """
+    GET (the job's owner): How many times fundis viewed the job, in total and
+    per day for the last `days` (default 30, max 90). Counts are written in
+    batches, so the latest few seconds may be missing.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_days = 90
+
+    def get(self, request, pk):
+        job = get_object_or_404(Job, pk=pk, client=request.user)
+        try:
+            days = max(1, min(int(request.query_params.get("days", 30)), self.max_days))
+        except ValueError:
+            return Response({"error": "days must be a number"}, status=400)
+
+        return Response({"job_id": job.id, **counter_totals(job.daily_stats.all(), ('view_count',), days)})
+
+
+
+class JobExportView(ExportView):
+    """
+    GET (staff): Every job as NDJSON or CSV (`format`), optionally bounded by
+    `since`/`until` on created_at and gzipped with `gzip=1`.
+    """
+    queryset = Job.objects.order_by('id')
+    columns = (
+        'id', 'client_id', 'payment_id', 'title', 'description', 'location', 'latitude', 'longitude',
+        'is_active', 'is_filled', 'created_at', 'expires_at',
+    )
+    name = 'jobs'
@@ -1,8 +1,16 @@
 from rest_framework import serializers
 from .models import Payment
+from ajirinow.sparse import SparseFieldsetMixin
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = '__all__'
 
+
+
+class PaymentStatusSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """What the dashboard shows for a job or ad's payment."""
+    class Meta:
+        model = Payment
+        fields = ['status', 'purpose', 'post_expiry_date']
@@ -73,3 +73,75 @@ class PaymentTests(TestCase):
         self.assertEqual(job.payment, payment)
         self.assertTrue(job.is_active)
 
+
+    def test_payment_export_streams_csv_ndjson_and_gzip(self):
+        import csv
+        import gzip
+        import io
+        import json
+
+        for purpose in ("post_job", "post_ad"):
+            Payment.objects.create(
+                user=self.user, phone="254700000000", amount=0, merchant_request_id="m",
+                checkout_request_id="c", status="Completed", purpose=purpose,
+            )
+        old = Payment.objects.get(purpose="post_ad")
+        Payment.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        response = self.client.get("/api/payments/export/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get("/api/payments/export/", {"format": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["purpose"] for row in rows], ["post_job", "post_ad"])
+        self.assertEqual(rows[0]["amount"], "100.00")
+
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get("/api/payments/export/", {"since": since, "gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.ndjson.gz"'))
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)["purpose"] for line in lines], ["post_job"])
+
+        response = self.client.get("/api/payments/export/", {"format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_payment_status_is_one_call(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from ads.models import Ad
+        from jobs.models import Job
+
+        payment = Payment.objects.create(user=self.user, phone="254700000000", amount=100,
+                                         status="Completed", purpose="post_job")
+        paid = Job.objects.create(client=self.user, title="Paid", description="d", location="Meru", payment=payment)
+        unpaid = Job.objects.create(client=self.user, title="Unpaid", description="d", location="Meru")
+        ad = Ad.objects.create(client=self.user, title="Ad", description="d", image="ads/ad.jpg")
+        paid_ad = Ad.objects.create(client=self.user, title="Paid ad", description="d", image="ads/ad.jpg",
+                                    payment=Payment.objects.create(user=self.user, phone="254700000000", amount=50,
+                                                                   status="Completed", purpose="post_ad"))
+        other = User.objects.create_user(phone_number="0700000009", name="Other", id_number="9",
+                                         password="password", role="client")
+        foreign = Job.objects.create(client=other, title="Not mine", description="d", location="Meru")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/payments/status/", {
+                "job_id": [f"{paid.id},{unpaid.id}", str(foreign.id)], "ad_id": f"{ad.id},{paid_ad.id}",
+            })
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            [(job["id"], job["status"], job["purpose"]) for job in response.data["jobs"]],
+            [(paid.id, "Completed", "post_job"), (unpaid.id, "Pending", None)],
+        )
+        # Same values as ad_payment_status.
+        self.assertEqual([(a["id"], a["status"]) for a in response.data["ads"]],
+                         [(ad.id, "pending"), (paid_ad.id, "completed")])
+
+        self.assertEqual(self.client.get("/api/payments/status/").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/api/payments/status/", {"job_id": "x"}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
@@ -1,10 +1,12 @@
 # payments/urls.py
 from django.urls import path
-from .views import job_payment_status, ad_payment_status
+from .views import job_payment_status, ad_payment_status, payment_status_batch, PaymentExportView
 
 urlpatterns = [
         path("job-status/", job_payment_status, name="job-status"),
         path('payments/ad-status/', ad_payment_status),
+        path('status/', payment_status_batch, name='payment-status-batch'),
+        path('export/', PaymentExportView.as_view(), name='payment-export'),
 
         ]
 
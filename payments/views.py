@@ -14,6 +14,7 @@ from ads.models import Ad
 from accounts.models import User
 from django.utils import timezone
 from datetime import timedelta
+from ajirinow.exports import ExportView
 
 
 class STKPushView(APIView):
@@ -141,7 +142,7 @@ def job_payment_status(request):
         return Response({"error": "job_id is required"}, status=400)
 
     try:
-        job = Job.objects.get(id=job_id, client=request.user)
+        job = Job.objects.select_related('payment').get(id=job_id, client=request.user)
 
         if job.payment:
             return Response({
@@ -160,8 +161,85 @@ def job_payment_status(request):
 def ad_payment_status(request):
     ad_id = request.GET.get('ad_id')
     try:
-        ad = Ad.objects.get(id=ad_id, client=request.user)
+        ad = Ad.objects.select_related('payment').get(id=ad_id, client=request.user)
         status = 'completed' if ad.payment and ad.payment.status == 'Completed' else 'pending'
         return Response({'status': status})
     except Ad.DoesNotExist:
         return Response({'status': 'not_found'}, status=404)
+
+
+MAX_STATUS_IDS = 100
+STATUS_COLUMNS = ('id', 'is_active', 'payment__status', 'payment__purpose', 'payment__post_expiry_date')
+
+
+def parse_ids(request, name):
+    """Ids from repeated and/or comma-separated `name` params."""
+    values = [value for param in request.GET.getlist(name) for value in param.split(',') if value.strip()]
+    if len(values) > MAX_STATUS_IDS:
+        raise ValueError(f"At most {MAX_STATUS_IDS} {name} values are allowed")
+    try:
+        return {int(value) for value in values}
+    except ValueError:
+        raise ValueError(f"{name} must be a list of numbers")
+
+
+def job_status(payment_status):
+    """As job_payment_status reports it: the payment's own status."""
+    return payment_status or "Pending"
+
+
+def ad_status(payment_status):
+    """As ad_payment_status reports it: 'completed' or 'pending'."""
+    return 'completed' if payment_status == 'Completed' else 'pending'
+
+
+def payment_statuses(queryset, ids, status):
+    if not ids:
+        return []
+    return [
+        {
+            "id": row['id'],
+            "is_active": row['is_active'],
+            "status": status(row['payment__status']),
+            "purpose": row['payment__purpose'],
+            "post_expiry_date": row['payment__post_expiry_date'],
+        }
+        for row in queryset.filter(id__in=ids).order_by('id').values(*STATUS_COLUMNS)
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payment_status_batch(request):
+    """
+    Payment status of many of the caller's jobs and ads in one call:
+    `?job_id=1,2&ad_id=3` (ids may also be repeated, at most 100 of each).
+    Jobs and ads that don't exist or aren't the caller's are left out.
+    Statuses match the single-item endpoints: the payment's status for jobs,
+    'completed'/'pending' for ads.
+    """
+    try:
+        job_ids = parse_ids(request, 'job_id')
+        ad_ids = parse_ids(request, 'ad_id')
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=400)
+    if not job_ids and not ad_ids:
+        return Response({"error": "job_id or ad_id is required"}, status=400)
+
+    return Response({
+        "jobs": payment_statuses(Job.objects.filter(client=request.user), job_ids, job_status),
+        "ads": payment_statuses(Ad.objects.filter(client=request.user), ad_ids, ad_status),
+    })
+
+
+class PaymentExportView(ExportView):
+    """
+    GET (staff): The payment ledger as NDJSON or CSV (`format`), optionally
+    bounded by `since`/`until` on created_at and gzipped with `gzip=1`.
+    """
+    queryset = Payment.objects.order_by('id')
+    columns = (
+        'id', 'user_id', 'phone', 'amount', 'status', 'purpose', 'description',
+        'merchant_request_id', 'checkout_request_id', 'created_at', 'post_expiry_date',
+    )
+    name = 'payments'